@@ -0,0 +1,220 @@
+"""
+Telemetry Analysis - Aggregates recorded sessions and renders heatmaps over the levels
+
+Usage:
+    python analyze_telemetry.py [telemetry folder] [--out heatmaps] [--workers N]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+from constants import TELEMETRY_DIR, LEVELS, TILE_SIZE, SIMULATION_HZ
+from telemetry import EVENT_ENEMY_STATE, EVENT_FIELDS, HEATMAPS, OUTCOMES, RUN_FIELDS
+from enemy import ENEMY_STATES
+
+CHASE = ENEMY_STATES.index("chase")
+WIN = OUTCOMES.index("win")
+LOSE = OUTCOMES.index("lose")
+
+# Overlay colour per heatmap
+HEATMAP_COLORS = {
+    "player": (0, 200, 255),
+    "deaths": (255, 40, 40),
+    "catches": (255, 0, 160),
+    "pickups": (255, 230, 0),
+    "chase_starts": (255, 120, 0),
+    "enemy_visits": (180, 60, 255),
+}
+
+
+def _empty_level():
+    return {
+        "heatmaps": {},
+        "runs": 0,
+        "wins": 0,
+        "losses": 0,
+        "win_time_ms": 0,
+        "chases": 0,
+        "chase_ticks": 0,
+    }
+
+
+def _chase_durations(events):
+    """
+    Chase lengths in ticks from enemy state events
+
+    Returns:
+        (run ids, durations) arrays, one entry per chase that ended in the file
+    """
+    events = events[events[:, 2] == EVENT_ENEMY_STATE]
+    if not len(events):
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+    # Group by run and enemy, in tick order
+    events = events[np.lexsort((events[:, 1], events[:, 5], events[:, 0]))]
+    same_enemy = (events[1:, 0] == events[:-1, 0]) & (events[1:, 5] == events[:-1, 5])
+    ended = same_enemy & (events[:-1, 6] == CHASE)
+    durations = events[1:, 1] - events[:-1, 1]
+    return events[:-1, 0][ended], durations[ended]
+
+
+def summarize_file(path):
+    """
+    Reduce one telemetry file to per-level aggregates (runs in a worker process)
+
+    Returns:
+        dict level index -> aggregate dict, or None if the file can't be read
+    """
+    try:
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        runs = arrays.get("runs")
+        events = arrays.get("events")
+        if (runs is None or events is None or runs.ndim != 2 or runs.shape[1] != RUN_FIELDS
+                or events.ndim != 2 or events.shape[1] != EVENT_FIELDS):
+            raise ValueError("not a telemetry file")
+    except (OSError, ValueError, EOFError, zipfile.BadZipFile, zlib.error) as e:
+        # Truncated, corrupt or foreign files are skipped, not fatal to the whole report
+        print(f"Skipping {path}: {e}", file=sys.stderr)
+        return None
+
+    levels = {}
+    for level_index in np.unique(runs[:, 0]):
+        level_runs = runs[runs[:, 0] == level_index]
+        wins = level_runs[:, 1] == WIN
+        level = _empty_level()
+        level["runs"] = len(level_runs)
+        level["wins"] = int(wins.sum())
+        level["losses"] = int((level_runs[:, 1] == LOSE).sum())
+        level["win_time_ms"] = int(level_runs[wins, 3].sum())
+        for name in HEATMAPS:
+            key = f"level{level_index}_{name}"
+            if key in arrays:
+                level["heatmaps"][name] = arrays[key].astype(np.uint64)
+        levels[int(level_index)] = level
+
+    # Event run ids index the rows of this file's runs array
+    run_ids, durations = _chase_durations(events)
+    for level_index, level in levels.items():
+        mask = runs[run_ids, 0] == level_index if len(run_ids) else np.zeros(0, dtype=bool)
+        level["chases"] = int(mask.sum())
+        level["chase_ticks"] = int(durations[mask].sum())
+    return levels
+
+
+def merge(total, levels):
+    """Add one file's aggregates into the running total"""
+    for level_index, level in levels.items():
+        into = total.setdefault(level_index, _empty_level())
+        for key in ("runs", "wins", "losses", "win_time_ms", "chases", "chase_ticks"):
+            into[key] += level[key]
+        for name, heatmap in level["heatmaps"].items():
+            existing = into["heatmaps"].get(name)
+            if existing is None:
+                into["heatmaps"][name] = heatmap
+            elif existing.shape == heatmap.shape:
+                existing += heatmap
+    return total
+
+
+def analyze(paths, workers=None):
+    """Summarize files across a process pool and merge the results"""
+    total = {}
+    chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for levels in pool.map(summarize_file, paths, chunksize=chunksize):
+            if levels:
+                merge(total, levels)
+    return total
+
+
+def render_heatmaps(total, out_dir, names):
+    """Draw each level with the Maze code and overlay its heatmaps as PNG files"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from maze import Maze
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+
+    for level_index, level in sorted(total.items()):
+        if not 0 <= level_index < len(LEVELS) or "maze" not in LEVELS[level_index]:
+            continue
+        maze = Maze(LEVELS[level_index]["maze"])
+        size = (maze.width * TILE_SIZE, maze.height * TILE_SIZE)
+
+        for name in names:
+            heatmap = level["heatmaps"].get(name)
+            if heatmap is None or heatmap.shape != (maze.height, maze.width):
+                continue
+            surface = pygame.Surface(size)
+            maze.draw(surface)
+
+            peak = heatmap.max()
+            if peak:
+                # One pixel per tile, scaled up; alpha follows the count
+                overlay = pygame.Surface((maze.width, maze.height), pygame.SRCALPHA)
+                overlay.fill(HEATMAP_COLORS[name])
+                alpha = pygame.surfarray.pixels_alpha(overlay)
+                alpha[:] = (np.sqrt(heatmap / peak) * 220).astype(np.uint8).T
+                del alpha
+                surface.blit(pygame.transform.scale(overlay, size), (0, 0))
+
+            path = os.path.join(out_dir, f"level{level_index + 1}_{name}.png")
+            pygame.image.save(surface, path)
+            written.append(path)
+
+    pygame.quit()
+    return written
+
+
+def print_summary(total):
+    names = {
+        level_index: LEVELS[level_index]["name"] if 0 <= level_index < len(LEVELS) else f"#{level_index}"
+        for level_index in total
+    }
+    width = max([len("Level")] + [len(name) for name in names.values()]) + 2
+    print(f"{'Level':<{width}}{'Runs':>8}{'Wins':>8}{'Losses':>8}{'Avg win':>10}{'Chases':>8}{'Avg chase':>11}")
+    for level_index, level in sorted(total.items()):
+        avg_win = level["win_time_ms"] / level["wins"] / 1000 if level["wins"] else 0
+        avg_chase = level["chase_ticks"] / level["chases"] / SIMULATION_HZ if level["chases"] else 0
+        print(f"{names[level_index]:<{width}}{level['runs']:>8}{level['wins']:>8}{level['losses']:>8}"
+              f"{avg_win:>9.1f}s{level['chases']:>8}{avg_chase:>10.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate telemetry files and render heatmaps")
+    parser.add_argument("folder", nargs="?", default=TELEMETRY_DIR, help="folder of .npz telemetry files")
+    parser.add_argument("--out", default="heatmaps", help="folder for the heatmap images")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--heatmaps", default="deaths,catches,player,enemy_visits",
+                        help=f"comma-separated heatmaps to render ({', '.join(HEATMAPS)})")
+    args = parser.parse_args()
+
+    names = [name for name in args.heatmaps.split(",") if name in HEATMAPS]
+    paths = sorted(glob.glob(os.path.join(args.folder, "*.npz")))
+    if not paths:
+        print(f"No telemetry files in {args.folder}")
+        return
+
+    start = time.perf_counter()
+    total = analyze(paths, args.workers)
+    print(f"Analyzed {len(paths)} files in {time.perf_counter() - start:.1f}s")
+    print_summary(total)
+
+    for path in render_heatmaps(total, args.out, names):
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,22 +2,111 @@
 Audio Manager - Handles game sounds and music
 """
 
+import threading
 import pygame
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; without it missing sounds stay silent
+    np = None
+
+
+# Recipes for the fallback sounds used when an asset file is missing.
+# Each recipe is a list of segments played back to back:
+#   ("tone", start_hz, end_hz, duration_ms)  - sine beep, or a chirp if the
+#                                             start and end frequencies differ
+#   ("noise", duration_ms)                   - white noise burst
+SYNTH_RECIPES = {
+    "collect": [("tone", 600, 1200, 90)],
+    "win": [("tone", 523, 523, 110), ("tone", 659, 659, 110), ("tone", 784, 784, 220)],
+    "lose": [("tone", 400, 120, 350), ("noise", 120)],
+    "move": [("noise", 30)],
+}
+
+SYNTH_VOLUME = 0.35
+SYNTH_FADE_MS = 5
+
+# Reserved mixer channels per sound category. Sounds only ever play on the
+# channels of their own category, so a burst of pickups can never cut off
+# the win/lose jingle.
+CHANNEL_CATEGORIES = {
+    "jingle": 1,
+    "sfx": 3,
+    "move": 1,
+}
+
+# Scheduling rules per sound: (category, priority, min interval in ms).
+# Higher priority sounds may steal a busy channel from lower priority ones;
+# requests arriving faster than the interval are dropped.
+SOUND_RULES = {
+    "win": ("jingle", 3, 0),
+    "lose": ("jingle", 3, 0),
+    "collect": ("sfx", 2, 50),
+    "move": ("move", 1, 80),
+}
+DEFAULT_SOUND_RULE = ("sfx", 1, 0)
+
 
 class AudioManager:
     """Manages all game audio including sounds and music"""
 
-    def __init__(self):
-        """Initialize audio system"""
+    def __init__(self, music_file=None):
+        """
+        Initialize audio system
+
+        Decoding the music and sound files is slow, so it is done on a
+        background thread; sounds simply don't play until they are ready.
+
+        Args:
+            music_file: Optional background music file to preload
+        """
         pygame.mixer.init()
         self.sounds = {}
         self.sound_enabled = True
 
+        # Sound requests queued this frame (name -> priority), flushed by update()
+        self.pending = {}
+        self.last_played = {}
+        self._setup_channels()
+
+        # Readiness flags set by the loader thread
+        self.music_file = music_file
+        self.music_ready = threading.Event()
+        self.sounds_ready = threading.Event()
+        self.loader = threading.Thread(target=self._load_assets, name="audio-loader", daemon=True)
+        self.loader.start()
+
+    def _load_assets(self):
+        """Background loader: music first (it plays on the menu), then sounds"""
+        if self.music_file:
+            try:
+                pygame.mixer.music.load(self.music_file)
+                self.music_ready.set()
+            except Exception:
+                pass  # No music, the game stays silent
+
         self._load_sounds()
+        self.sounds_ready.set()
+
+    def _setup_channels(self):
+        """Reserve mixer channels and split them between the sound categories"""
+        total = sum(CHANNEL_CATEGORIES.values())
+        if pygame.mixer.get_num_channels() < total:
+            pygame.mixer.set_num_channels(total)
+        pygame.mixer.set_reserved(total)
+
+        # Channel objects by index, the indices owned by each category and
+        # the priority of the sound last started on each channel
+        self.mixer_channels = [pygame.mixer.Channel(i) for i in range(total)]
+        self.channel_priority = [0] * total
+        self.channels = {}
+        index = 0
+        for category, count in CHANNEL_CATEGORIES.items():
+            self.channels[category] = list(range(index, index + count))
+            index += count
 
     def _load_sounds(self):
-        """Load all game sounds"""
+        """Load all game sounds, synthesising any that fail to load"""
         sound_files = {
             "collect": "assets/sounds/collect.wav",
             "win": "assets/sounds/win.wav",
@@ -27,60 +116,153 @@ class AudioManager:
 
         for name, filepath in sound_files.items():
             try:
-                self.sounds[name] = pygame.mixer.Sound(filepath)
-            except:
-                # If sound file doesn't exist, create placeholder
-                self.sounds[name] = None
+                sound = pygame.mixer.Sound(filepath)
+            except Exception:
+                # If sound file doesn't exist, synthesise a replacement now so
+                # nothing has to be generated on the frame the sound plays
+                sound = self._generate_beep(name)
+            # Publish only the finished Sound; play_sound skips missing entries
+            self.sounds[name] = sound
+
+    def is_ready(self, sound_name):
+        """Return True once the named sound has finished loading"""
+        return self.sounds.get(sound_name) is not None
 
     def play_sound(self, sound_name):
         """
-        Play a sound effect
+        Queue a sound effect to be played on the next update()
+
+        Requesting the same sound several times in one frame plays it once.
+        Sounds that are still loading in the background are skipped.
 
         Args:
             sound_name: Name of sound to play
         """
-        if self.sound_enabled and sound_name in self.sounds:
-            sound = self.sounds[sound_name]
-            if sound:
-                sound.play()
-            else:
-                # Generate beep sound if file not available
-                self._generate_beep(sound_name)
+        if self.sound_enabled and self.is_ready(sound_name):
+            self.pending[sound_name] = self._get_rule(sound_name)[1]
+
+    def update(self):
+        """Flush queued sound requests to the mixer, highest priority first"""
+        if not self.pending:
+            return
+
+        now = pygame.time.get_ticks()
+        queued = sorted(self.pending.items(), key=lambda item: -item[1])
+        self.pending.clear()
+
+        for sound_name, priority in queued:
+            category, _, min_interval = self._get_rule(sound_name)
+
+            # Per-sound rate limiting
+            last = self.last_played.get(sound_name)
+            if last is not None and now - last < min_interval:
+                continue
+
+            index = self._pick_channel(category, priority)
+            if index is None:
+                continue
+
+            self.mixer_channels[index].play(self.sounds[sound_name])
+            self.channel_priority[index] = priority
+            self.last_played[sound_name] = now
+
+    def _get_rule(self, sound_name):
+        return SOUND_RULES.get(sound_name, DEFAULT_SOUND_RULE)
+
+    def _pick_channel(self, category, priority):
+        """
+        Find a channel for a sound in the given category
+
+        Returns the index of an idle channel if there is one, otherwise the
+        busy channel playing the lowest priority sound if it is below the new
+        priority, or None if the sound should be dropped.
+        """
+        victim = None
+        for index in self.channels.get(category, []):
+            if not self.mixer_channels[index].get_busy():
+                return index
+            if victim is None or self.channel_priority[index] < self.channel_priority[victim]:
+                victim = index
+
+        if victim is not None and self.channel_priority[victim] < priority:
+            return victim
+        return None
 
     def _generate_beep(self, sound_type):
         """
-        Generate simple beep sound as fallback
+        Generate a fallback sound from its synth recipe
 
         Args:
             sound_type: Type of sound to generate
+
+        Returns:
+            pygame.mixer.Sound or None if synthesis is unavailable
         """
+        if np is None:
+            return None
+
+        mixer_info = pygame.mixer.get_init()
+        if not mixer_info:
+            return None
+        sample_rate, sample_format, channels = mixer_info
+
+        recipe = SYNTH_RECIPES.get(sound_type, [("tone", 440, 440, 100)])
+        rng = np.random.default_rng(len(sound_type))
+
+        segments = []
+        for segment in recipe:
+            if segment[0] == "tone":
+                _, start_hz, end_hz, duration = segment
+                n_samples = int(round(duration * sample_rate / 1000))
+                # Integrate the (linearly swept) frequency to get the phase
+                freq = np.linspace(start_hz, end_hz, n_samples, endpoint=False)
+                phase = 2 * np.pi * np.cumsum(freq) / sample_rate
+                wave = np.sin(phase)
+            else:
+                _, duration = segment
+                n_samples = int(round(duration * sample_rate / 1000))
+                wave = rng.uniform(-1.0, 1.0, n_samples)
+
+            # Short fade in/out so segments don't click
+            fade = min(n_samples // 2, int(SYNTH_FADE_MS * sample_rate / 1000))
+            if fade > 0:
+                ramp = np.linspace(0.0, 1.0, fade)
+                wave[:fade] *= ramp
+                wave[-fade:] *= ramp[::-1]
+            segments.append(wave)
+
+        wave = np.concatenate(segments) * SYNTH_VOLUME
+
+        # Convert to the mixer's sample format
+        bits = abs(sample_format)
+        if bits == 8:
+            if sample_format > 0:
+                samples = ((wave + 1.0) * 127.5).astype(np.uint8)
+            else:
+                samples = (wave * 127).astype(np.int8)
+        elif sample_format == 32:
+            samples = wave.astype(np.float32)
+        elif sample_format == -32:
+            samples = (wave * 2147483647).astype(np.int32)
+        else:
+            samples = (wave * 32767).astype(np.int16)
+
+        if channels > 1:
+            samples = np.repeat(samples[:, None], channels, axis=1)
+
         try:
-            # Different frequencies for different sound types
-            frequencies = {
-                "collect": 600,
-                "win": 800,
-                "lose": 200,
-                "move": 400,
-            }
-
-            freq = frequencies.get(sound_type, 440)
-            duration = 100  # milliseconds
-
-            # Create a simple beep
-            sample_rate = 22050
-            n_samples = int(round(duration * sample_rate / 1000))
-
-            # Generate sine wave (simplified)
-            # Note: This is a basic implementation
-            # pygame.mixer can be used for more complex sound generation
-        except:
-            pass  # Silently fail if sound generation fails
+            return pygame.sndarray.make_sound(np.ascontiguousarray(samples))
+        except Exception:
+            return None  # Silently fall back to no sound
 
     def toggle_sound(self):
         """Toggle sound on/off"""
         self.sound_enabled = not self.sound_enabled
+        if not self.sound_enabled:
+            self.pending.clear()
         return self.sound_enabled
 
     def stop_all(self):
         """Stop all playing sounds"""
-        pygame.mixer.stop()
\ No newline at end of file
+        self.pending.clear()
+        pygame.mixer.stop()
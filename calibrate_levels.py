@@ -0,0 +1,302 @@
+"""
+Level Calibration - Recommends time limits from seeded headless bot runs
+
+Usage:
+    python calibrate_levels.py [--runs 32] [--win-rate 0.9] [--slack 1.5] [--workers N]
+
+Every in-memory level is played --runs times by a scripted solver, one
+random seed per run, across a process pool. The limits that let
+--win-rate of the solver's runs finish in time, scaled by --slack (people
+are slower than the solver), are written to LEVEL_TIMES_FILE, which
+GameManager.load_level reads in place of the LEVELS times.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from constants import LEVELS, LEVEL_TIMES_FILE, TILE_SIZE, SIMULATION_DT
+from level_loader import layout_hash
+
+# Runs end as timeouts after this many times the level's LEVELS limit
+TIME_CAP_FACTOR = 3
+
+# Recommended limits are rounded up to this many seconds
+ROUND_SECONDS = 5
+
+# (dx, dy, action index into maze_env.ACTIONS)
+MOVES = ((0, -1, 0), (0, 1, 1), (-1, 0, 2), (1, 0, 3))
+
+
+class _Solver:
+    """Collects the nearest star, then heads for the exit, keeping a tile away from enemies
+
+    The route is planned with a breadth-first search from the tile the
+    player is moving to, with tiles next to an enemy blocked. With no safe
+    route it steps to the open neighbour furthest from the enemies, or
+    waits.
+    """
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.width = maze.width
+        self.walls = maze.wall_grid
+        self.stars = [(int(c.x // TILE_SIZE), int(c.y // TILE_SIZE)) for c in maze.collectibles]
+        self.exit_tile = (maze.exit_rect.x // TILE_SIZE, maze.exit_rect.y // TILE_SIZE)
+        self.action = -1
+        self.waits = 0
+
+    def _open(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.maze.height and not self.walls[y * self.width + x]
+
+    def _danger(self):
+        tiles = set()
+        for enemy in self.maze.enemies:
+            for x, y in ((enemy.grid_x, enemy.grid_y),
+                         (int(enemy.x // TILE_SIZE), int(enemy.y // TILE_SIZE))):
+                tiles.add((x, y))
+                for dx, dy, _ in MOVES:
+                    tiles.add((x + dx, y + dy))
+        return tiles
+
+    def _first_step(self, start, targets, blocked):
+        """Action of the first step on a shortest route to any target, or None"""
+        first = {start: None}
+        frontier = deque([start])
+        while frontier:
+            tile = frontier.popleft()
+            if tile in targets:
+                return first[tile]
+            x, y = tile
+            for dx, dy, action in MOVES:
+                step = (x + dx, y + dy)
+                if step not in first and step not in blocked and self._open(*step):
+                    first[step] = action if first[tile] is None else first[tile]
+                    frontier.append(step)
+        return None
+
+    def _flee(self, start, danger):
+        enemies = [(enemy.grid_x, enemy.grid_y) for enemy in self.maze.enemies]
+
+        def distance(tile):
+            return min((abs(tile[0] - x) + abs(tile[1] - y) for x, y in enemies), default=0)
+
+        best, best_distance = None, distance(start)
+        for dx, dy, action in MOVES:
+            step = (start[0] + dx, start[1] + dy)
+            if self._open(*step) and distance(step) > best_distance:
+                best, best_distance = action, distance(step)
+        return best
+
+    def choose(self):
+        """
+        Action for this tick (index into maze_env.ACTIONS, -1 for none)
+
+        Only replanned when the player is at rest or reaches its tile this
+        tick, which is when Player.update reads the held key.
+        """
+        player = self.maze.player
+        if player.is_moving and (abs(player.target_x - player.x) > player.speed
+                                 or abs(player.target_y - player.y) > player.speed):
+            return self.action
+
+        start = (player.grid_x, player.grid_y)
+        targets = {tile for tile, c in zip(self.stars, self.maze.collectibles) if not c.collected}
+        if not targets:
+            targets = {self.exit_tile}
+        danger = self._danger()
+        action = self._first_step(start, targets, danger - targets)
+        if action is None:
+            action = self._flee(start, danger)
+        if action is None:
+            self.waits += 1
+            action = -1
+        self.action = action
+        return action
+
+
+def simulate(task):
+    """
+    Play one seeded run of a level with the solver (runs in a worker process)
+
+    Args:
+        task: (level index, seed, with_enemies)
+
+    Returns:
+        dict: outcome ("win", "time" or "caught"), ticks, waits (replans
+        with no move) and chases (enemy switches into chase)
+    """
+    from maze import Maze
+    from maze_env import ACTION_KEY_STATES, NO_KEYS
+    from game_manager import step_level
+
+    level_index, seed, with_enemies = task
+    level = LEVELS[level_index]
+    random.seed(seed)
+    maze = Maze(level["maze"])
+    if not with_enemies:
+        maze.enemies = []
+        maze.enemy_cells = {}
+        maze.enemy_buckets = {}
+    solver = _Solver(maze)
+
+    timer = level["time"] * TIME_CAP_FACTOR
+    states = [enemy.state for enemy in maze.enemies]
+    ticks = chases = 0
+    outcome = None
+    while outcome is None:
+        action = solver.choose()
+        timer, outcome = step_level(maze, timer, ACTION_KEY_STATES[action] if action >= 0 else NO_KEYS)
+        ticks += 1
+        for index, enemy in enumerate(maze.enemies):
+            if enemy.state != states[index]:
+                states[index] = enemy.state
+                chases += enemy.state == "chase"
+    return {"outcome": outcome, "ticks": ticks, "waits": solver.waits, "chases": chases}
+
+
+def recommend(results, win_rate, slack):
+    """
+    Time limit letting win_rate of the runs that weren't caught finish in time
+
+    Catches don't depend on the limit, so they are left out of the rate.
+
+    Returns:
+        tuple: (limit in seconds, or None if too few runs finished at all,
+        completion seconds quantile it was scaled from)
+    """
+    eligible = [result for result in results if result["outcome"] != "caught"]
+    finished = sorted(result["ticks"] for result in eligible if result["outcome"] == "win")
+    needed = math.ceil(win_rate * len(eligible))
+    if not eligible or needed > len(finished):
+        return None, None
+    seconds = finished[max(needed, 1) - 1] * SIMULATION_DT
+    return math.ceil(seconds * slack / ROUND_SECONDS) * ROUND_SECONDS, seconds
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0
+
+
+def calibrate(level_indices, runs, win_rate, slack, workers=None, seed=0):
+    """
+    Run the solver over the levels and summarize each
+
+    Returns:
+        dict: level index -> summary dict
+    """
+    tasks = [(index, seed + run, True) for index in level_indices for run in range(runs)]
+    # One run without enemies per level gives the uncontested route time
+    tasks += [(index, seed, False) for index in level_indices]
+
+    chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(simulate, tasks, chunksize=chunksize))
+
+    summaries = {}
+    for index in level_indices:
+        level_results = [r for (i, _, enemies), r in zip(tasks, results) if i == index and enemies]
+        free_run = next(r for (i, _, enemies), r in zip(tasks, results) if i == index and not enemies)
+        wins = [r["ticks"] for r in level_results if r["outcome"] == "win"]
+        limit, quantile = recommend(level_results, win_rate, slack)
+        ideal = free_run["ticks"] if free_run["outcome"] == "win" else None
+        summaries[index] = {
+            "runs": len(level_results),
+            "wins": len(wins),
+            "caught": sum(r["outcome"] == "caught" for r in level_results),
+            "median": _percentile(wins, 0.5) * SIMULATION_DT,
+            "p90": _percentile(wins, 0.9) * SIMULATION_DT,
+            "ideal": ideal * SIMULATION_DT if ideal else None,
+            # Share of a winning run lost to avoiding enemies
+            "interference": (sum((t - ideal) / t for t in wins) / len(wins)) if wins and ideal else None,
+            "chases": sum(r["chases"] for r in level_results) / len(level_results),
+            "quantile": quantile,
+            "time": limit,
+        }
+    return summaries
+
+
+def write_config(summaries, path, win_rate, slack, runs):
+    """Write the recommended limits where load_time_limits() reads them"""
+    levels = {}
+    for index, summary in summaries.items():
+        if summary["time"] is None:
+            continue
+        level = LEVELS[index]
+        levels[level["name"]] = {
+            "layout": layout_hash(level["maze"]),
+            "time": summary["time"],
+            "median": round(summary["median"], 2),
+            "p90": round(summary["p90"], 2),
+            "caught_rate": round(summary["caught"] / summary["runs"], 3),
+            "interference": None if summary["interference"] is None else round(summary["interference"], 3),
+        }
+    config = {
+        "generated": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "target_win_rate": win_rate,
+        "slack": slack,
+        "runs": runs,
+        "levels": levels,
+    }
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(config, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def print_summary(summaries):
+    width = max([len("Level")] + [len(LEVELS[index]["name"]) for index in summaries]) + 2
+    print(f"{'Level':<{width}}{'Runs':>6}{'Won':>6}{'Caught':>8}{'Median':>9}{'P90':>8}"
+          f"{'Ideal':>8}{'Interf.':>9}{'Chases':>8}{'Now':>6}{'New':>6}")
+    for index, s in sorted(summaries.items()):
+        ideal = f"{s['ideal']:.1f}s" if s["ideal"] else "-"
+        interference = f"{s['interference'] * 100:.0f}%" if s["interference"] is not None else "-"
+        new = f"{s['time']}s" if s["time"] is not None else "-"
+        print(f"{LEVELS[index]['name']:<{width}}{s['runs']:>6}{s['wins']:>6}{s['caught']:>8}"
+              f"{s['median']:>8.1f}s{s['p90']:>7.1f}s{ideal:>8}{interference:>9}{s['chases']:>8.1f}"
+              f"{str(LEVELS[index]['time']) + 's':>6}{new:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommend level time limits from bot runs")
+    parser.add_argument("--runs", type=int, default=32, help="seeded runs per level")
+    parser.add_argument("--win-rate", type=float, default=0.9,
+                        help="share of the solver's runs (not caught) that must finish in time")
+    parser.add_argument("--slack", type=float, default=1.5, help="factor on the solver's time for human players")
+    parser.add_argument("--levels", default=None, help="comma-separated level numbers (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="first random seed")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default=LEVEL_TIMES_FILE, help="config file to write")
+    parser.add_argument("--dry-run", action="store_true", help="print the results without writing the config")
+    args = parser.parse_args()
+
+    if args.levels:
+        indices = [int(number) - 1 for number in args.levels.split(",")]
+    else:
+        indices = range(len(LEVELS))
+    indices = [index for index in indices if 0 <= index < len(LEVELS) and "maze" in LEVELS[index]]
+    if not indices:
+        print("No levels to calibrate")
+        return
+
+    start = time.perf_counter()
+    summaries = calibrate(indices, args.runs, args.win_rate, args.slack, args.workers, args.seed)
+    total_runs = (args.runs + 1) * len(indices)
+    print(f"Simulated {total_runs} runs in {time.perf_counter() - start:.1f}s")
+    print_summary(summaries)
+
+    if not args.dry_run:
+        write_config(summaries, args.out, args.win_rate, args.slack, args.runs)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
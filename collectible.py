@@ -5,11 +5,31 @@ Collectible Class - Items player can collect for puzzles
 import pygame
 import math
 from constants import COLLECTIBLE_SIZE, COLLECTIBLE_COLOR, TILE_SIZE
+from image_cache import load_image, render_sprite
+
+
+def _paint_star(surface, color, size, center):
+    points = []
+    for i in range(10):
+        angle = math.pi * 2 * i / 10 - math.pi / 2
+        if i % 2 == 0:
+            radius = size // 2
+        else:
+            radius = size // 4
+        points.append((center + math.cos(angle) * radius, center + math.sin(angle) * radius))
+
+    pygame.draw.polygon(surface, color, points)
+    pygame.draw.polygon(surface, (255, 255, 255), points, 2)
 
 
 class Collectible:
     """Collectible items that must be gathered to escape"""
 
+    __slots__ = (
+        "x", "y", "size", "color", "collected",
+        "animation_offset", "animation_speed", "image", "use_image", "sprite",
+    )
+
     def __init__(self, x, y):
         """
         Initialize collectible
@@ -27,13 +47,16 @@ class Collectible:
         self.animation_speed = 0.1
 
         # Try to load collectible image
-        try:
-            self.image = pygame.image.load("assets/images/collectible.png")
-            self.image = pygame.transform.scale(self.image, (self.size, self.size))
-            self.use_image = True
-        except:
-            self.image = None
-            self.use_image = False
+        self.image = load_image("assets/images/collectible.png", self.size)
+        self.use_image = self.image is not None
+
+        # Image or star shape, pre-rendered once
+        if self.use_image:
+            self.sprite = self.image
+        else:
+            center = self.size // 2 + 2  # room for the outline
+            self.sprite = render_sprite(("star", self.color, self.size), (center * 2, center * 2),
+                                        _paint_star, self.color, self.size, center)
 
     def update(self):
         """Update collectible animation"""
@@ -68,33 +91,20 @@ class Collectible:
             self.size
         )
 
+    def get_sprite(self):
+        """(surface, top-left) pair for batched blitting, or None once collected"""
+        if self.collected:
+            return None
+        # Calculate floating offset
+        float_offset = math.sin(self.animation_offset) * 5
+        half = self.sprite.get_width() // 2
+        return self.sprite, (self.x - half, int(self.y + float_offset) - half)
+
     def draw(self, screen):
         """Draw collectible with floating animation"""
-        if not self.collected:
-            # Calculate floating offset
-            float_offset = math.sin(self.animation_offset) * 5
-            draw_y = int(self.y + float_offset)
-
-            if self.use_image and self.image:
-                screen.blit(
-                    self.image,
-                    (self.x - self.size // 2, draw_y - self.size // 2)
-                )
-            else:
-                # Draw as star shape
-                points = []
-                for i in range(10):
-                    angle = math.pi * 2 * i / 10 - math.pi / 2
-                    if i % 2 == 0:
-                        radius = self.size // 2
-                    else:
-                        radius = self.size // 4
-                    px = self.x + math.cos(angle) * radius
-                    py = draw_y + math.sin(angle) * radius
-                    points.append((px, py))
-
-                pygame.draw.polygon(screen, self.color, points)
-                pygame.draw.polygon(screen, (255, 255, 255), points, 2)
+        sprite = self.get_sprite()
+        if sprite:
+            screen.blit(*sprite)
 
     def reset(self):
         """Reset collectible state"""
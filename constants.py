@@ -5,8 +5,28 @@ Game Constants - Configuration and settings
 # Screen settings
 SCREEN_WIDTH = 700
 SCREEN_HEIGHT = 700
-FPS = 60
+FPS = 60  # render frame cap
 WINDOW_TITLE = "Escape the Maze!"
+DEBUG = False  # log timing diagnostics (startup, input latency) to the console
+
+# Simulation runs at a fixed rate, independent of the render frame rate.
+# All per-tick speeds, delays and cooldowns are in simulation ticks.
+SIMULATION_HZ = 60
+SIMULATION_DT = 1 / SIMULATION_HZ
+MAX_FRAME_TIME = 0.25  # seconds of lag simulated at most after a stall
+MAX_TICKS_PER_FRAME = 5
+IDLE_WAIT_MS = 250  # longest sleep on static screens before background work (music, sounds) runs
+
+# Render quality tiers, stepped down and up by measured frame time (quality.py)
+QUALITY_FLAT = 0  # flat colours, no shadows, glow or blur
+QUALITY_REDUCED = 1  # shaded walls and gradients, no glow, blur or button animation
+QUALITY_FULL = 2
+QUALITY_ADAPTIVE = True
+QUALITY_WINDOW_FRAMES = 60  # frames averaged for each decision
+QUALITY_DOWN_LOAD = 0.9  # step down when frames take more of the budget than this
+QUALITY_UP_LOAD = 0.5  # step up when they take less
+QUALITY_UP_HOLD_FRAMES = 600  # frames to wait after a step down before stepping up
+SCALED_WINDOW = False  # show the SCREEN_WIDTH x SCREEN_HEIGHT frame in a resizable window; renders the same pixels
 
 # Grid settings
 TILE_SIZE = 35
@@ -28,9 +48,17 @@ PURPLE = (128, 0, 128)
 LIGHT_BLUE = (100, 150, 255)
 DARK_BLUE = (20, 40, 80)
 
+# Level colours, shared by the game and the thumbnail tool
+WALL_COLOR = (80, 80, 100)
+WALL_EDGE_COLOR = (120, 120, 140)
+WALL_HIGHLIGHT_COLOR = (100, 100, 120)
+EXIT_COLOR = (100, 100, 100)  # locked
+EXIT_OPEN_COLOR = (0, 220, 0)
+
 # Player settings
 PLAYER_SIZE = 25
 PLAYER_SPEED = 5
+INPUT_LATENCY_SAMPLES = 256  # key press to motion timings kept for the report
 PLAYER_COLOR = CYAN
 
 # Enemy settings
@@ -39,6 +67,14 @@ ENEMY_SPEED = 2.5
 ENEMY_COLOR = RED
 ENEMY_CHASE_DISTANCE = 280
 ENEMY_LOSE_DISTANCE = 300
+PERCEPTION_CELL_TILES = 8  # broadphase bucket size for enemy detection
+ENEMY_VISIT_DECAY_TICKS = 0  # halve patrol visit counts this often (0 = never)
+PATH_CLUSTER_SIZE = 16  # tiles per side of a pathfinding cluster
+PATH_CACHE_SIZE = 1024  # paths kept by the pathfinder's LRU cache
+
+# Music volume per game state (applied only when the state changes)
+MUSIC_VOLUME = 0.30
+MUSIC_VOLUME_WIN = 0.10
 
 # Collectible settings
 COLLECTIBLE_SIZE = 20
@@ -50,6 +86,50 @@ LEVEL_2_TIME = 100
 LEVEL_3_TIME = 110
 LEVEL_4_TIME = 120
 LEVEL_5_TIME = 150
+# Calibrated limits that replace the ones above (see calibrate_levels.py)
+LEVEL_TIMES_FILE = "level_times.json"
+
+# Scoring
+COLLECT_POINTS = 100
+EXIT_POINTS = 500
+TIME_BONUS_PER_SECOND = 10
+
+# Grid observations (maze_env.py)
+OBSERVATION_VIEW_RADIUS = 5  # tiles around the player in a cropped view
+
+# Level thumbnails (make_thumbnails.py)
+THUMBNAIL_DIR = "thumbnails"
+THUMBNAIL_TILE_SIZE = 7  # pixels per tile in a thumbnail
+
+# Video recording (F10)
+RECORDING_DIR = "recordings"
+RECORDING_POOL_SIZE = 8  # frames waiting for the writer before new ones are dropped
+RECORDING_FORMAT = "auto"  # "video" (needs ffmpeg), "png", "raw" or "auto"
+
+# Rewind settings
+REWIND_SECONDS = 30
+REWIND_KEYFRAME_INTERVAL = 60  # ticks between full keyframes
+REWIND_STEP_SECONDS = 3  # how far one rewind goes back
+
+# Quick-save file
+SAVE_FILE = "saves/quicksave.dat"
+
+# Leaderboard database (written on a background thread)
+LEADERBOARD_FILE = "saves/leaderboard.db"
+LEADERBOARD_BATCH_SIZE = 256  # most queued runs committed in one transaction
+
+# Gameplay telemetry (needs NumPy)
+TELEMETRY_DIR = "telemetry"
+TELEMETRY_TRACK_SIZE = 4096  # player positions buffered before folding into heatmaps
+TELEMETRY_EVENT_SIZE = 1024  # events buffered before folding into heatmaps
+TELEMETRY_FLUSH_RUNS = 20  # finished runs per .npz file
+TELEMETRY_MAX_EVENTS = 65536  # raw event rows kept per .npz file; heatmaps still count the rest
+
+# Streamed worlds (levels with a "world" folder instead of a "maze" layout)
+WORLD_CHUNK_SIZE = 32  # tiles per chunk side
+WORLD_ACTIVE_RADIUS = 1  # chunks around the player's chunk with live entities
+WORLD_PREFETCH_RADIUS = 2  # chunks around the player's chunk decoded ahead of time
+WORLD_CHUNK_CACHE = 64  # decoded chunks kept in memory
 
 # Game states
 STATE_MENU = "menu"
@@ -59,11 +139,18 @@ STATE_WIN = "win"
 STATE_LOSE = "lose"
 STATE_INSTRUCTIONS = "instructions"
 
+# Music volume per game state (see MUSIC_VOLUME above)
+MUSIC_STATE_VOLUMES = {
+    STATE_PLAYING: MUSIC_VOLUME,
+    STATE_WIN: MUSIC_VOLUME_WIN,
+}
+
 # Font settings
 FONT_NAME = None
 FONT_SIZE_LARGE = 56
 FONT_SIZE_MEDIUM = 36
 FONT_SIZE_SMALL = 24
+NOTICE_SECONDS = 3  # how long short status messages stay on screen
 
 # Level maze layouts (20x20 grid)
 LEVEL_1_MAZE = [
@@ -1,11 +1,31 @@
 import pygame
 import math
 import random
-from collections import defaultdict
 from constants import (
     ENEMY_SIZE, ENEMY_SPEED, ENEMY_COLOR, TILE_SIZE,
-    ENEMY_CHASE_DISTANCE, ENEMY_LOSE_DISTANCE
+    ENEMY_CHASE_DISTANCE, ENEMY_LOSE_DISTANCE, GRID_WIDTH, GRID_HEIGHT
 )
+from image_cache import load_image, render_sprite
+from visit_grid import VisitGrid
+
+# Integer codes used when packing enemy state (see get_state/set_state)
+ENEMY_STATES = ("patrol", "chase", "return")
+DIRECTIONS = ("up", "down", "left", "right")
+
+# Perception compares squared pixel distances
+CHASE_DISTANCE_SQ = ENEMY_CHASE_DISTANCE ** 2
+LOSE_DISTANCE_SQ = ENEMY_LOSE_DISTANCE ** 2
+
+# Body colour per state when drawn without an image (patrol uses ENEMY_COLOR)
+STATE_COLORS = {"chase": (255, 50, 50), "return": (255, 150, 150)}
+
+
+def _paint_enemy(surface, color, radius, size):
+    pygame.draw.circle(surface, color, (radius, radius), radius)
+    eye_offset = size // 6
+    eye_size = size // 10
+    pygame.draw.circle(surface, (255, 255, 0), (radius - eye_offset, radius - eye_offset), eye_size)
+    pygame.draw.circle(surface, (255, 255, 0), (radius + eye_offset, radius - eye_offset), eye_size)
 
 
 class Enemy:
@@ -13,7 +33,29 @@ class Enemy:
     and smarter patrol memory. Kept in the original code style so it plugs right in.
     """
 
-    def __init__(self, x, y):
+    __slots__ = (
+        "start_x", "start_y", "grid_x", "grid_y", "x", "y",
+        "target_x", "target_y", "prev_x", "prev_y",
+        "size", "speed", "color", "is_moving",
+        "state", "patrol_direction", "last_move_direction",
+        "move_timer", "move_delay", "stuck_counter",
+        "last_player_grid_x", "last_player_grid_y", "chase_cooldown",
+        "visits", "pathfinder", "path", "image", "use_image", "sprites",
+        "on_tile_change", "on_state_change",
+    )
+
+    def __init__(self, x, y, visits=None, pathfinder=None, on_tile_change=None):
+        """
+        Args:
+            x: Grid x position
+            y: Grid y position
+            visits: VisitGrid shared by the level's enemies as patrol memory;
+                a private one is created if omitted
+            pathfinder: Optional HierarchicalPathfinder used to walk back to
+                the start tile; greedy steering is used without one
+            on_tile_change: Optional callable(enemy), called whenever the
+                enemy's grid tile changes after construction
+        """
         self.start_x = x
         self.start_y = y
         self.grid_x = x
@@ -22,6 +64,8 @@ class Enemy:
         self.y = y * TILE_SIZE + TILE_SIZE // 2
         self.target_x = self.x
         self.target_y = self.y
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.size = ENEMY_SIZE
         self.speed = ENEMY_SPEED * 2.5
         self.color = ENEMY_COLOR
@@ -39,16 +83,35 @@ class Enemy:
         self.chase_cooldown = 0
 
         # Patrol memory: count visits per tile to prefer exploring less-visited tiles
-        self.visited_tiles = defaultdict(int)
-        self.visited_tiles[(self.grid_x, self.grid_y)] += 1
-
-        try:
-            self.image = pygame.image.load("assets/images/enemy.png")
-            self.image = pygame.transform.scale(self.image, (self.size, self.size))
-            self.use_image = True
-        except:
-            self.image = None
-            self.use_image = False
+        if visits is None:
+            visits = VisitGrid(max(GRID_WIDTH, x + 1), max(GRID_HEIGHT, y + 1))
+        self.visits = visits
+        self.visits.add(self.grid_x, self.grid_y)
+
+        # Remaining tiles of the route home, next tile last
+        self.pathfinder = pathfinder
+        self.path = None
+        self.on_tile_change = on_tile_change
+        # Optional callable(enemy), called when update() switches state
+        # (restores through reset/set_state don't count)
+        self.on_state_change = None
+
+        self.image = load_image("assets/images/enemy.png", self.size)
+        self.use_image = self.image is not None
+        self.sprites = self._build_sprites()
+
+    def _build_sprites(self):
+        """One pre-rendered surface per state, so drawing is a single blit"""
+        if self.use_image and self.image:
+            return {state: self.image for state in ENEMY_STATES}
+        radius = self.size // 2
+        side = radius * 2 + 1
+        sprites = {}
+        for state in ENEMY_STATES:
+            color = STATE_COLORS.get(state, self.color)
+            sprites[state] = render_sprite(("enemy", color, self.size), (side, side),
+                                           _paint_enemy, color, radius, self.size)
+        return sprites
 
     def calculate_distance(self, x1, y1, x2, y2):
         return math.hypot(x2 - x1, y2 - y1)
@@ -108,22 +171,52 @@ class Enemy:
     # ----------------------
     # Update loop
     # ----------------------
-    def update(self, player_pos, walls):
+    def _sees_player(self, player_pos, walls, fov):
+        if fov is not None:
+            # Shared player field of view: one bitmap lookup
+            return fov.is_visible(self.grid_x, self.grid_y)
+        return self.has_line_of_sight(player_pos, walls)
+
+    def _enter(self, state):
+        self.state = state
+        if self.on_state_change is not None:
+            self.on_state_change(self)
+
+    def update(self, player_pos, walls, fov=None, perceive=True):
+        """
+        Advance one simulation tick
+
+        Args:
+            player_pos: Player pixel position
+            walls: Wall rects
+            fov: Optional shared FieldOfView from the player
+            perceive: False when the caller already knows the player is out
+                of chase range, so a patrolling enemy skips detection
+        """
+        # Position at the start of the tick, for render interpolation
+        self.prev_x = self.x
+        self.prev_y = self.y
+
         player_x, player_y = player_pos
-        dist = self.calculate_distance(self.x, self.y, player_x, player_y)
-        has_los = self.has_line_of_sight(player_pos, walls)
 
         # State transitions (now require LoS for detection)
         if self.state == "patrol":
-            if dist < ENEMY_CHASE_DISTANCE and has_los:
-                self.state = "chase"
+            if perceive:
+                dist_sq = (player_x - self.x) ** 2 + (player_y - self.y) ** 2
+                spotted = dist_sq < CHASE_DISTANCE_SQ and self._sees_player(player_pos, walls, fov)
+            else:
+                spotted = False
+            if spotted:
+                self._enter("chase")
                 self.last_player_grid_x = int(player_x / TILE_SIZE)
                 self.last_player_grid_y = int(player_y / TILE_SIZE)
                 self.chase_cooldown = 180
                 self.stuck_counter = 0
 
         elif self.state == "chase":
-            if dist < ENEMY_CHASE_DISTANCE and has_los:
+            dist_sq = (player_x - self.x) ** 2 + (player_y - self.y) ** 2
+            has_los = self._sees_player(player_pos, walls, fov)
+            if dist_sq < CHASE_DISTANCE_SQ and has_los:
                 self.last_player_grid_x = int(player_x / TILE_SIZE)
                 self.last_player_grid_y = int(player_y / TILE_SIZE)
                 # refresh cooldown while player visible
@@ -135,19 +228,19 @@ class Enemy:
                     self.chase_cooldown -= 2
 
                 # if far, reduce cooldown faster
-                if dist > ENEMY_LOSE_DISTANCE:
+                if dist_sq > LOSE_DISTANCE_SQ:
                     self.chase_cooldown -= 2
 
             # transition to return when cooldown exhausted or stuck too long
             if self.chase_cooldown <= 0 or self.stuck_counter > 6:
-                self.state = "return"
+                self._enter("return")
                 self.stuck_counter = 0
             elif self.chase_cooldown > 0:
                 self.chase_cooldown -= 1
 
         elif self.state == "return":
             if self.grid_x == self.start_x and self.grid_y == self.start_y:
-                self.state = "patrol"
+                self._enter("patrol")
                 self.stuck_counter = 0
 
         # Movement handling (grid-based with smooth interpolation)
@@ -159,7 +252,7 @@ class Enemy:
                 self.x = self.target_x
                 self.y = self.target_y
                 # remember visited
-                self.visited_tiles[(self.grid_x, self.grid_y)] += 1
+                self.visits.add(self.grid_x, self.grid_y)
         else:
             self.move_timer += 1
             if self.move_timer >= self.move_delay:
@@ -195,7 +288,7 @@ class Enemy:
                 )
                 blocked = any(test_rect.colliderect(w) for w in walls)
                 if not blocked:
-                    candidates.append((self.visited_tiles.get((nx, ny), 0), d))
+                    candidates.append((self.visits.get(nx, ny), d))
 
             # If no candidates (surrounded/blocked), allow reversing as last resort
             if not candidates:
@@ -278,6 +371,9 @@ class Enemy:
                             self.last_move_direction = "up"
 
         elif self.state == "return":
+            if self.pathfinder is not None and self._follow_path_home(walls):
+                return True
+
             dx_to_start = self.start_x - self.grid_x
             dy_to_start = self.start_y - self.grid_y
 
@@ -308,6 +404,28 @@ class Enemy:
 
         return moved
 
+    def _follow_path_home(self, walls):
+        """Take the next step of the pathfinder's route to the start tile"""
+        path = self.path
+        if path:
+            next_x, next_y = path[-1]
+            if abs(next_x - self.grid_x) + abs(next_y - self.grid_y) != 1:
+                path = None  # knocked off the route (e.g. by a chase or rewind)
+        if not path:
+            path = self.pathfinder.find_path((self.grid_x, self.grid_y), (self.start_x, self.start_y))
+            if not path:
+                self.path = None
+                return False
+            path.reverse()
+            self.path = path
+
+        next_x, next_y = path[-1]
+        if self._attempt_move(next_x - self.grid_x, next_y - self.grid_y, walls):
+            path.pop()
+            return True
+        self.path = None
+        return False
+
     # ----------------------
     # Low-level helpers
     # ----------------------
@@ -344,8 +462,9 @@ class Enemy:
             self.grid_y = new_y
             self.is_moving = True
             self.stuck_counter = 0
-            # record visit (will increment again on arrival)
-            self.visited_tiles[(new_x, new_y)] += 0  # ensure key exists
+            if self.on_tile_change is not None:
+                self.on_tile_change(self)
+            # visit is recorded on arrival
             return True
         return False
 
@@ -373,25 +492,22 @@ class Enemy:
             self.size, self.size
         )
 
-    def draw(self, screen):
-        if self.use_image and self.image:
-            screen.blit(self.image, (self.x - self.size // 2, self.y - self.size // 2))
-        else:
-            if self.state == "chase":
-                color = (255, 50, 50)
-            elif self.state == "return":
-                color = (255, 150, 150)
-            else:
-                color = self.color
+    def get_draw_position(self, alpha=1.0):
+        """Position interpolated between the last two ticks (alpha 0-1)"""
+        return (
+            self.prev_x + (self.x - self.prev_x) * alpha,
+            self.prev_y + (self.y - self.prev_y) * alpha,
+        )
 
-            pygame.draw.circle(screen, color, (int(self.x), int(self.y)), self.size // 2)
+    def get_sprite(self, alpha=1.0):
+        """(surface, top-left) pair for batched blitting"""
+        x, y = self.get_draw_position(alpha)
+        sprite = self.sprites[self.state]
+        half = sprite.get_width() // 2
+        return sprite, (int(x) - half, int(y) - half)
 
-            eye_offset = self.size // 6
-            eye_size = self.size // 10
-            pygame.draw.circle(screen, (255, 255, 0),
-                               (int(self.x - eye_offset), int(self.y - eye_offset)), eye_size)
-            pygame.draw.circle(screen, (255, 255, 0),
-                               (int(self.x + eye_offset), int(self.y - eye_offset)), eye_size)
+    def draw(self, screen, alpha=1.0):
+        screen.blit(*self.get_sprite(alpha))
 
     def reset(self):
         self.grid_x = self.start_x
@@ -400,11 +516,73 @@ class Enemy:
         self.y = self.start_y * TILE_SIZE + TILE_SIZE // 2
         self.target_x = self.x
         self.target_y = self.y
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.is_moving = False
         self.state = "patrol"
         self.move_timer = 0
         self.chase_cooldown = 0
         self.stuck_counter = 0
-        self.visited_tiles.clear()
-        self.visited_tiles[(self.grid_x, self.grid_y)] = 1
+        self.visits.add(self.grid_x, self.grid_y)
         self.last_move_direction = None
+        self.last_player_grid_x = None
+        self.last_player_grid_y = None
+        self.path = None
+        if self.on_tile_change is not None:
+            self.on_tile_change(self)
+
+    def get_state(self):
+        """
+        Pack the mutable enemy state into a tuple of ints
+
+        Pixel positions are stored in quarter pixels, None as -1 and the
+        state/direction strings as indices into ENEMY_STATES/DIRECTIONS.
+        The shared visit memory is not included.
+        """
+        return (
+            self.grid_x, self.grid_y,
+            round(self.x * 4), round(self.y * 4),
+            round(self.target_x * 4), round(self.target_y * 4),
+            int(self.is_moving),
+            ENEMY_STATES.index(self.state),
+            DIRECTIONS.index(self.patrol_direction),
+            DIRECTIONS.index(self.last_move_direction) if self.last_move_direction else -1,
+            self.move_timer, self.stuck_counter, self.chase_cooldown,
+            -1 if self.last_player_grid_x is None else self.last_player_grid_x,
+            -1 if self.last_player_grid_y is None else self.last_player_grid_y,
+        )
+
+    def set_state(self, state):
+        """Restore state packed by get_state(), given as a sequence of Python ints"""
+        (self.grid_x, self.grid_y, x, y, target_x, target_y, is_moving,
+         state_code, patrol_code, last_move_code,
+         self.move_timer, self.stuck_counter, self.chase_cooldown,
+         last_player_x, last_player_y) = state
+        self.x = self.prev_x = x / 4
+        self.y = self.prev_y = y / 4
+        self.target_x = target_x / 4
+        self.target_y = target_y / 4
+        self.is_moving = bool(is_moving)
+        self.state = ENEMY_STATES[state_code]
+        self.patrol_direction = DIRECTIONS[patrol_code]
+        self.last_move_direction = DIRECTIONS[last_move_code] if last_move_code >= 0 else None
+        self.last_player_grid_x = last_player_x if last_player_x >= 0 else None
+        self.last_player_grid_y = last_player_y if last_player_y >= 0 else None
+        self.path = None
+        if self.on_tile_change is not None:
+            self.on_tile_change(self)
+
+    def place(self, x, y):
+        """Put the enemy on a grid tile, standing still"""
+        self.grid_x = x
+        self.grid_y = y
+        self.x = x * TILE_SIZE + TILE_SIZE // 2
+        self.y = y * TILE_SIZE + TILE_SIZE // 2
+        self.target_x = self.x
+        self.target_y = self.y
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.is_moving = False
+        self.path = None
+        if self.on_tile_change is not None:
+            self.on_tile_change(self)
@@ -0,0 +1,123 @@
+"""
+Field of View - Recursive shadowcasting from the player's tile
+"""
+
+# Transforms mapping the generic octant scan onto the eight real octants
+OCTANTS = (
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+)
+
+
+class FieldOfView:
+    """Set of tiles visible from one origin tile, stored as a bitmap
+
+    The bitmap is only rebuilt when the origin moves, so any number of
+    "can tile X see the player?" queries per tick cost one lookup each.
+    """
+
+    def __init__(self, wall_grid, width, height, radius=None):
+        """
+        Args:
+            wall_grid: Row-major bytes-like, non-zero for wall tiles
+            width: Grid width in tiles
+            height: Grid height in tiles
+            radius: Maximum view distance in tiles (default: whole grid)
+        """
+        self.wall_grid = wall_grid
+        self.width = width
+        self.height = height
+        self.radius = radius if radius is not None else width + height
+        self.visible = bytearray(width * height)
+        self.visible_tiles = []
+        self.origin = None
+
+    def update(self, origin_x, origin_y):
+        """Recompute visibility if the origin tile changed"""
+        if self.origin != (origin_x, origin_y):
+            self.origin = (origin_x, origin_y)
+            self._compute(origin_x, origin_y)
+
+    def invalidate(self):
+        """Force the next update() to recompute (e.g. after walls change)"""
+        self.origin = None
+
+    def is_visible(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.visible[y * self.width + x] != 0
+        return False
+
+    def _is_blocking(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.wall_grid[y * self.width + x] != 0
+        return True
+
+    def _mark(self, x, y):
+        index = y * self.width + x
+        if not self.visible[index]:
+            self.visible[index] = 1
+            self.visible_tiles.append(index)
+
+    def _compute(self, origin_x, origin_y):
+        # Clear only the tiles lit last time
+        visible = self.visible
+        for index in self.visible_tiles:
+            visible[index] = 0
+        self.visible_tiles = []
+
+        if not (0 <= origin_x < self.width and 0 <= origin_y < self.height):
+            return
+        self._mark(origin_x, origin_y)
+        for transform in OCTANTS:
+            self._cast_octant(origin_x, origin_y, transform)
+
+    def _cast_octant(self, cx, cy, transform):
+        """Scan one octant row by row, narrowing the lit slope range past walls
+
+        The classic algorithm recurses once per wall run; an explicit stack
+        is used instead so huge open maps can't hit the recursion limit.
+        """
+        xx, xy, yx, yy = transform
+        radius = self.radius
+        radius_sq = radius * radius
+        width = self.width
+        height = self.height
+        stack = [(1, 1.0, 0.0)]
+
+        while stack:
+            row, start, end = stack.pop()
+            if start < end:
+                continue
+            new_start = 0.0
+            for j in range(row, radius + 1):
+                dx = -j - 1
+                dy = -j
+                blocked = False
+                while dx <= 0:
+                    dx += 1
+                    x = cx + dx * xx + dy * xy
+                    y = cy + dx * yx + dy * yy
+                    left_slope = (dx - 0.5) / (dy + 0.5)
+                    right_slope = (dx + 0.5) / (dy - 0.5)
+                    if start < right_slope:
+                        continue
+                    if end > left_slope:
+                        break
+
+                    if dx * dx + dy * dy <= radius_sq and 0 <= x < width and 0 <= y < height:
+                        self._mark(x, y)
+
+                    wall = self._is_blocking(x, y)
+                    if blocked:
+                        if wall:
+                            new_start = right_slope
+                        else:
+                            blocked = False
+                            start = new_start
+                    elif wall and j < radius:
+                        # Scan the part of the next rows left of this wall later
+                        blocked = True
+                        stack.append((j + 1, start, left_slope))
+                        new_start = right_slope
+                if blocked:
+                    break
@@ -2,11 +2,75 @@
 Game Manager - Manages game states, levels, and game flow
 """
 
+import logging
+import os
+import time
 import pygame
 from constants import *
 from maze import Maze
 from ui import UI
 from audio_manager import AudioManager
+from level_loader import LevelPreloader, load_time_limits
+from quality import QualityController
+from input_latency import InputLatency
+from player import KEY_DIRECTIONS
+from world_chunks import ChunkedWorld, WorldError
+from save_game import SaveError, SaveWriter, apply_to_maze, read_save, serialize
+
+try:
+    from rewind import RewindBuffer
+except ImportError:  # Rewind needs NumPy, the game runs fine without it
+    RewindBuffer = None
+
+try:
+    from telemetry import TelemetryRecorder
+except ImportError:  # Telemetry needs NumPy too
+    TelemetryRecorder = None
+
+try:
+    from video_recorder import VideoRecorder
+except ImportError:  # Recording copies frames with NumPy
+    VideoRecorder = None
+
+try:
+    from leaderboard import Leaderboard
+except ImportError:  # Python built without sqlite3: no leaderboard
+    Leaderboard = None
+
+logger = logging.getLogger(__name__)
+
+
+def step_level(maze, timer, keys=None):
+    """
+    Advance a level by one simulation tick and check how it ended
+
+    Shared by GameManager and the training environment (maze_env.py).
+
+    Args:
+        maze: Level being played
+        timer: Seconds left before the tick
+        keys: Key state for the player (default: the real keyboard)
+
+    Returns:
+        tuple: (seconds left, outcome) where outcome is None while the level
+        goes on, or "time", "caught" or "win"
+    """
+    maze.update(keys)
+    timer -= SIMULATION_DT
+
+    if timer <= 0:
+        return timer, "time"
+    if maze.check_player_enemy_collision():
+        return timer, "caught"
+    if maze.check_player_exit_collision():
+        return timer, "win"
+    return timer, None
+
+
+def win_bonus(timer):
+    """Points for reaching the exit with timer seconds left"""
+    return int(timer * TIME_BONUS_PER_SECOND) + EXIT_POINTS
+
 
 class GameManager:
     """Main game manager controlling game flow and states"""
@@ -15,23 +79,52 @@ class GameManager:
         self.screen = screen
         self.state = STATE_MENU
         self.ui = UI(screen)
-        self.audio = AudioManager()
-
-        # 🎵 Load background music ONCE
-        pygame.mixer.music.load("assets/sounds/background.mp3")
-        pygame.mixer.music.set_volume(0.30)  # lowered volume
-        pygame.mixer.music.play(-1)  # loop forever
+        # 🎵 Background music is loaded ONCE, off the main thread, and
+        # started by update() as soon as it is ready
+        self.audio = AudioManager("assets/sounds/background.mp3")
+        self.music_started = False
         self.music_paused = False
-
+        self.music_volume = MUSIC_VOLUME
+        self.last_state = self.state
+
+        self.preloader = LevelPreloader()
+        # Calibrated time limits by level name, where available
+        self.time_limits = load_time_limits()
+        self.quality = QualityController()
+        self.input_latency = InputLatency()
+        self.rewind = RewindBuffer() if RewindBuffer else None
+        self.save_writer = SaveWriter()
+        self.leaderboard = Leaderboard() if Leaderboard else None
+        self.telemetry = TelemetryRecorder(self.save_writer) if TelemetryRecorder else None
+        self.recorder = VideoRecorder() if VideoRecorder else None
         self.current_level = 0
         self.maze = None
         self.timer = 0
         self.max_time = 0
         self.score = 0
         self.last_collected = 0
-        self.mouse_pressed = False
+        # Cause of a loss not yet recorded: it stands once the lose screen
+        # is left without rewinding
+        self.pending_loss = None
+        # Mouse state comes from events; a click waits here for the next update
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.click_pos = None
+
+    def _report_save_failures(self):
+        """Show background writes (saves, telemetry) that failed"""
+        for path, error in self.save_writer.take_failures():
+            self.ui.show_notice(f"Can't write {os.path.basename(path)}: {error.strerror or error}")
 
     # Music helpers
+    def _start_music_when_ready(self):
+        if self.music_started or not self.audio.music_ready.is_set():
+            return
+        pygame.mixer.music.set_volume(self.music_volume)  # lowered volume
+        pygame.mixer.music.play(-1)  # loop forever
+        if self.music_paused:
+            pygame.mixer.music.pause()
+        self.music_started = True
+
     def _pause_music(self):
         if not self.music_paused:
             pygame.mixer.music.pause()
@@ -42,51 +135,203 @@ class GameManager:
             pygame.mixer.music.unpause()
             self.music_paused = False
 
-    def load_level(self, level_index):
+    def _set_music_volume(self, volume):
+        if volume != self.music_volume:
+            pygame.mixer.music.set_volume(volume)
+            self.music_volume = volume
+
+    def _on_state_change(self):
+        """Apply per-state settings once, when the state has just changed"""
+        volume = MUSIC_STATE_VOLUMES.get(self.state)
+        if volume is not None:
+            self._set_music_volume(volume)
+
+        # Build the next level while the win screen is up
+        if self.state == STATE_WIN:
+            self.preloader.preload(self.current_level + 1)
+
+    def load_level(self, level_index, maze=None):
+        """
+        Make a level the current one, with a full timer
+
+        Args:
+            level_index: Index into LEVELS
+            maze: Already built Maze for the level (default: take the
+                preloaded one or build it)
+
+        Returns:
+            bool: False if a streamed world couldn't be opened; the game
+            then goes back to the menu with a notice
+        """
         if 0 <= level_index < len(LEVELS):
             level_data = LEVELS[level_index]
-            self.maze = Maze(level_data["maze"])
-            self.max_time = level_data["time"]
+            self._settle_loss()
+            if maze is None and "world" in level_data:
+                try:
+                    maze = ChunkedWorld(level_data["world"])
+                except WorldError as e:
+                    self.ui.show_notice(f"Can't load {level_data['name']}: {e}")
+                    self.state = STATE_MENU
+                    return False
+            self._end_telemetry_run("abandon")
+            if self.maze and self.maze.streaming:
+                self.maze.close()
+            self.maze = maze or self.preloader.take(level_index) or Maze(level_data["maze"])
+            self.max_time = self.time_limits.get(level_data["name"], level_data["time"])
             self.timer = self.max_time
             self.current_level = level_index
             self.last_collected = 0
+            # Bests are read in the background, ready for the win screen
+            if self.leaderboard:
+                self.leaderboard.load(level_data["name"])
+            if self.rewind is not None:
+                self.rewind.clear()
+            self._begin_telemetry_run()
+            return True
+        return False
 
     def start_game(self):
-        self.current_level = 0
         self.score = 0
-        self.load_level(self.current_level)
-        self.state = STATE_PLAYING
-        self._resume_music()
+        if self.load_level(0):
+            self.state = STATE_PLAYING
+            self._resume_music()
 
     def restart_level(self):
-        self.load_level(self.current_level)
+        if self.maze:
+            self._settle_loss()
+            self._end_telemetry_run("abandon")
+            # Restore the current maze in place instead of re-parsing it
+            self.maze.reset()
+            self.timer = self.max_time
+            self.last_collected = 0
+            if self.rewind is not None:
+                self.rewind.clear()
+            self._begin_telemetry_run()
+        elif not self.load_level(self.current_level):
+            return
         self.state = STATE_PLAYING
         self._resume_music()
 
     def next_level(self):
         if self.current_level < len(LEVELS) - 1:
-            self.current_level += 1
-            self.load_level(self.current_level)
-            self.state = STATE_PLAYING
-            self._resume_music()
+            if self.load_level(self.current_level + 1):
+                self.state = STATE_PLAYING
+                self._resume_music()
         else:
             self.state = STATE_MENU
 
+    def rewind_time(self, seconds=REWIND_STEP_SECONDS):
+        """
+        Step the current level back in time and carry on playing
+
+        Args:
+            seconds: How far to go back
+
+        Returns:
+            bool: True if there was history to rewind to
+        """
+        if self.rewind is None or not self.maze or self.maze.streaming:
+            return False
+        restored = self.rewind.rewind(self.maze, int(seconds * SIMULATION_HZ))
+        if restored is None:
+            return False
+        self.timer, self.score, self.last_collected = restored
+        # The run goes on, so a loss on the lose screen no longer counts
+        self.pending_loss = None
+        self.state = STATE_PLAYING
+        self._resume_music()
+        return True
+
+    def can_rewind(self):
+        return self.rewind is not None and len(self.rewind) > 0
+
+    def quick_save(self, path=SAVE_FILE):
+        """Save the current level session; the file is written in the background"""
+        if self.state != STATE_PLAYING or not self.maze or self.maze.streaming:
+            return False
+        data = serialize(self.current_level, self.timer, self.score, self.last_collected, self.maze)
+        self.save_writer.write(path, data)
+        # A failed write is reported later by _report_save_failures()
+        self.ui.show_notice("Game saved")
+        return True
+
+    def quick_load(self, path=SAVE_FILE):
+        """
+        Load a session saved by quick_save()
+
+        The save is applied to a newly built maze first, so a bad save
+        leaves the session being played untouched.
+
+        Returns:
+            bool: True if the save was loaded, False if it was missing or invalid
+        """
+        try:
+            save = read_save(path)
+            level_index = save["level_index"]
+            if not 0 <= level_index < len(LEVELS) or "maze" not in LEVELS[level_index]:
+                raise SaveError("Save file is for an unknown level")
+            maze = Maze(LEVELS[level_index]["maze"])
+            apply_to_maze(save, maze)
+        except SaveError as e:
+            self.ui.show_notice(f"Quick load failed: {e}")
+            return False
+
+        self.load_level(level_index, maze)
+        self.timer = save["timer"]
+        self.score = save["score"]
+        self.last_collected = save["last_collected"]
+        self.state = STATE_PLAYING
+        self._resume_music()
+        return True
+
     def handle_event(self, event):
+        if event.type == pygame.MOUSEMOTION:
+            self.mouse_pos = event.pos
+            return
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.mouse_pos = self.click_pos = event.pos
+            return
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+            self.quick_load()
+            return
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F10:
+            self.toggle_recording()
+            return
+
         if self.state == STATE_PLAYING:
             self._handle_playing_event(event)
+        elif self.state == STATE_LOSE:
+            self._handle_lose_event(event)
 
     def _handle_playing_event(self, event):
         if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
+            direction = KEY_DIRECTIONS.get(event.key)
+            if direction:
+                # Queued so a tap made while moving between tiles still counts
+                if self.maze and self.maze.player:
+                    self.maze.player.queue_direction(direction, time.perf_counter())
+            elif event.key == pygame.K_ESCAPE:
                 self.state = STATE_PAUSED
             elif event.key == pygame.K_r:
                 self.restart_level()
+            elif event.key == pygame.K_BACKSPACE:
+                self.rewind_time()
+            elif event.key == pygame.K_F5:
+                self.quick_save()
+
+    def _handle_lose_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_BACKSPACE:
+            self.rewind_time()
 
     def update(self):
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_buttons = pygame.mouse.get_pressed()
-        self.mouse_pressed = mouse_buttons[0]
+        mouse_pos = self.mouse_pos
+
+        self._start_music_when_ready()
+        self._report_save_failures()
+
+        if self.state != self.last_state:
+            self.last_state = self.state
+            self._on_state_change()
 
         if self.state == STATE_MENU:
             self._resume_music()
@@ -98,7 +343,6 @@ class GameManager:
 
         elif self.state == STATE_PLAYING:
             self._resume_music()
-            pygame.mixer.music.set_volume(0.30)
             self._update_playing()
 
         elif self.state == STATE_PAUSED:
@@ -106,32 +350,48 @@ class GameManager:
             self._update_pause(mouse_pos)
 
         elif self.state == STATE_WIN:
-            pygame.mixer.music.set_volume(0.10)
             self._update_win(mouse_pos)
 
         elif self.state == STATE_LOSE:
             self._pause_music()
             self._update_lose(mouse_pos)
 
+        # A click is handled by the first update after it
+        self.click_pos = None
+
+        # Send this frame's queued sound requests to the mixer in one go
+        self.audio.update()
+
+    def is_idle(self):
+        """
+        True when the screen can't change without input
+
+        That is any screen but gameplay, once button animations have
+        settled. main() then sleeps until the next event instead of
+        updating and redrawing every frame.
+        """
+        if self.state == STATE_PLAYING or self.ui.animating():
+            return False
+        return not (self.recorder and self.recorder.recording)
+
     def _update_menu(self, mouse_pos):
-        action = self.ui.update_menu(mouse_pos, self.mouse_pressed)
+        action = self.ui.update_menu(mouse_pos, self.click_pos)
         if action == "start":
             self.start_game()
         elif action == "instructions":
             self.state = STATE_INSTRUCTIONS
         elif action == "exit":
-            pygame.quit()
-            import sys
-            sys.exit()
+            # Leave through main()'s loop so shutdown() finishes background writes
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
 
     def _update_instructions(self, mouse_pos):
-        action = self.ui.update_instructions(mouse_pos, self.mouse_pressed)
+        action = self.ui.update_instructions(mouse_pos, self.click_pos)
         if action == "back":
             self.state = STATE_MENU
             self._resume_music()  # ✅ continue music again
 
     def _update_pause(self, mouse_pos):
-        action = self.ui.update_pause(mouse_pos, self.mouse_pressed)
+        action = self.ui.update_pause(mouse_pos, self.click_pos)
         if action == "resume":
             self.state = STATE_PLAYING
         elif action == "restart":
@@ -140,17 +400,18 @@ class GameManager:
             self.state = STATE_MENU
 
     def _update_win(self, mouse_pos):
-        action = self.ui.update_win(mouse_pos, self.mouse_pressed)
+        action = self.ui.update_win(mouse_pos, self.click_pos)
         if action == "next":
             self.next_level()
         elif action == "menu":
             self.state = STATE_MENU
 
     def _update_lose(self, mouse_pos):
-        action = self.ui.update_lose(mouse_pos, self.mouse_pressed)
+        action = self.ui.update_lose(mouse_pos, self.click_pos)
         if action == "retry":
             self.restart_level()
         elif action == "menu":
+            self._settle_loss()
             self.state = STATE_MENU
             self._resume_music()
 
@@ -158,36 +419,108 @@ class GameManager:
         if not self.maze:
             return
 
-        self.maze.update()
+        self.timer, outcome = step_level(self.maze, self.timer)
+        if self.telemetry:
+            self.telemetry.record_tick()
+
+        player = self.maze.player
+        if player and player.input_latency is not None:
+            self.input_latency.add(player.input_latency)
+            player.input_latency = None
 
         collected = self.maze.get_collected_count()
         if collected > self.last_collected:
+            if self.telemetry:
+                self.telemetry.record_pickup()
             self.audio.play_sound("collect")
-            self.score += 100
+            self.score += COLLECT_POINTS
             self.last_collected = collected
 
-        self.timer -= 1 / FPS
-        if self.timer <= 0:
+        if self.rewind is not None and not self.maze.streaming:
+            self.rewind.record(self.maze, self.timer, self.score, self.last_collected)
+
+        if outcome == "time":
             self.audio.play_sound("lose")
             self.state = STATE_LOSE
             self.lose_reason = "Time's up!"
-            return
+            self.pending_loss = "time"
 
-        if self.maze.check_player_enemy_collision():
+        elif outcome == "caught":
             self.audio.play_sound("lose")
             self.state = STATE_LOSE
             self.lose_reason = "Caught by enemy!"
-            return
+            self.pending_loss = "caught"
 
-        if self.maze.check_player_exit_collision():
+        elif outcome == "win":
             self.audio.play_sound("win")
-            time_bonus = int(self.timer * 10)
-            self.score += time_bonus + 500
+            self.score += win_bonus(self.timer)
             self.time_taken = self.max_time - self.timer
             self.state = STATE_WIN
+            self._record_run("win")
+
+    def _record_run(self, outcome, death_cause=None):
+        """Queue the finished run for the leaderboard and telemetry (never blocks)"""
+        if self.leaderboard:
+            self.leaderboard.record_run(
+                LEVELS[self.current_level]["name"], outcome,
+                self.max_time - self.timer, self.score
+            )
+        if self.telemetry and death_cause:
+            self.telemetry.record_death(death_cause)
+        self._end_telemetry_run(outcome)
+
+    def _settle_loss(self):
+        """Record a pending loss; rewinding from the lose screen cancels it instead"""
+        if self.pending_loss:
+            cause, self.pending_loss = self.pending_loss, None
+            self._record_run("lose", cause)
+
+    def _begin_telemetry_run(self):
+        # Streamed worlds have no fixed grid to build heatmaps on
+        if self.telemetry and not self.maze.streaming:
+            self.telemetry.begin_run(self.current_level, self.maze)
+
+    def _end_telemetry_run(self, outcome):
+        if self.telemetry:
+            self.telemetry.end_run(outcome, self.max_time - self.timer, self.score)
+
+    def toggle_recording(self):
+        """Start or stop recording the screen (F10)"""
+        if not self.recorder:
             return
+        if self.recorder.recording:
+            self.recorder.stop()
+            self.ui.show_notice(f"Recording stopped: {self.recorder.frames} frames, "
+                                f"{self.recorder.dropped} dropped")
+        else:
+            self.ui.show_notice(f"Recording to {self.recorder.start(self.screen)}")
+
+    def shutdown(self):
+        """Finish background writes before the game exits"""
+        report = self.input_latency.report()
+        if report:
+            logger.debug(report)
+        self._settle_loss()
+        if self.telemetry:
+            self._end_telemetry_run("abandon")
+            self.telemetry.flush()
+        self.save_writer.flush()
+        if self.leaderboard:
+            self.leaderboard.close()
+        if self.recorder:
+            self.recorder.close()
+
+    def draw(self, alpha=1.0):
+        """
+        Draw the current state
+
+        Args:
+            alpha: How far (0-1) rendering is between the last two simulation
+                ticks, used to interpolate moving entities
+        """
+        quality = self.quality.tier
+        self.ui.quality = quality
 
-    def draw(self):
         if self.state == STATE_MENU:
             self.ui.draw_menu()
 
@@ -195,9 +528,9 @@ class GameManager:
             self.ui.draw_instructions()
 
         elif self.state == STATE_PLAYING:
-            self.screen.fill(BLACK)
             if self.maze:
-                self.maze.draw(self.screen)
+                # The level paints the whole screen, so it isn't cleared first
+                self.maze.draw(self.screen, alpha, quality)
                 level_data = LEVELS[self.current_level]
                 self.ui.draw_hud(
                     self.timer,
@@ -206,19 +539,31 @@ class GameManager:
                     level_data["name"],
                     self.score
                 )
+            else:
+                self.screen.fill(BLACK)
 
         elif self.state == STATE_PAUSED:
             if self.maze:
-                self.maze.draw(self.screen)
+                self.maze.draw(self.screen, quality=quality)
             self.ui.draw_pause_menu()
 
         elif self.state == STATE_WIN:
             level_data = LEVELS[self.current_level]
+            best = self.leaderboard.best(level_data["name"]) if self.leaderboard else None
             self.ui.draw_win_screen(
                 level_data["name"],
                 self.time_taken,
-                self.score
+                self.score,
+                best
             )
 
         elif self.state == STATE_LOSE:
-            self.ui.draw_lose_screen(self.lose_reason)
+            hint = "Press BACKSPACE to rewind" if self.can_rewind() else None
+            self.ui.draw_lose_screen(self.lose_reason, hint)
+
+        # Grab the finished frame before main() flips it
+        if self.recorder:
+            self.recorder.capture(self.screen)
+
+        # Status messages go over the frame but stay out of recordings
+        self.ui.draw_notice()
@@ -0,0 +1,48 @@
+"""
+Image Cache - Loads each sprite image once and shares it between entities
+"""
+
+import pygame
+
+_images = {}
+
+
+def load_image(path, size):
+    """
+    Load an image scaled to a square size, reusing earlier loads
+
+    Args:
+        path: Image file path
+        size: Width and height in pixels
+
+    Returns:
+        pygame.Surface, or None if the image can't be loaded
+    """
+    key = (path, size)
+    if key not in _images:
+        try:
+            image = pygame.image.load(path)
+            _images[key] = pygame.transform.scale(image, (size, size))
+        except Exception:
+            _images[key] = None
+    return _images[key]
+
+
+def render_sprite(key, size, paint, *args):
+    """
+    Draw a procedural sprite once onto a transparent surface and reuse it
+
+    Args:
+        key: Hashable cache key describing the look (e.g. kind and colour)
+        size: (width, height) of the surface
+        paint: Function called as paint(surface, *args) to draw the sprite
+
+    Returns:
+        pygame.Surface with per-pixel alpha
+    """
+    key = ("sprite", key, size)
+    if key not in _images:
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        paint(surface, *args)
+        _images[key] = surface
+    return _images[key]
@@ -0,0 +1,48 @@
+"""
+Input Latency - Statistics of the time from a key press to the player moving
+"""
+
+from collections import deque
+from constants import INPUT_LATENCY_SAMPLES
+
+
+class InputLatency:
+    """Rolling window of input-to-motion latencies, in milliseconds
+
+    A sample runs from when the game reads a movement KEYDOWN to the tick
+    that starts the move it asked for. Presses made mid-move wait for the
+    current move to end, so they show up here as longer samples.
+    """
+
+    def __init__(self, size=INPUT_LATENCY_SAMPLES):
+        """
+        Args:
+            size: Most recent samples kept
+        """
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, milliseconds):
+        self.samples.append(milliseconds)
+        self.count += 1
+
+    def summary(self):
+        """
+        Returns:
+            tuple: (mean, 95th percentile, max) over the window, or None
+            before the first sample
+        """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return sum(ordered) / len(ordered), p95, ordered[-1]
+
+    def report(self):
+        """One line for the console, or None before the first sample"""
+        summary = self.summary()
+        if summary is None:
+            return None
+        mean, p95, worst = summary
+        return (f"Input latency over the last {len(self.samples)} of {self.count} moves: "
+                f"mean {mean:.1f} ms, p95 {p95:.1f} ms, max {worst:.1f} ms")
@@ -0,0 +1,182 @@
+"""
+Leaderboard - Per-level bests and run history in SQLite, written behind the game loop
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from constants import LEADERBOARD_FILE, LEADERBOARD_BATCH_SIZE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    level TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    time_taken REAL NOT NULL,
+    score INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_level ON runs (level, finished_at);
+CREATE TABLE IF NOT EXISTS level_bests (
+    level TEXT PRIMARY KEY,
+    best_time REAL,
+    best_score INTEGER,
+    wins INTEGER NOT NULL,
+    runs INTEGER NOT NULL
+);
+"""
+
+INSERT_RUN = "INSERT INTO runs (level, outcome, time_taken, score, finished_at) VALUES (?, ?, ?, ?, ?)"
+
+# Losses carry NULL time/score, which COALESCE keeps out of the bests
+UPSERT_BEST = """
+INSERT INTO level_bests (level, best_time, best_score, wins, runs) VALUES (?, ?, ?, ?, 1)
+ON CONFLICT (level) DO UPDATE SET
+    best_time = MIN(COALESCE(best_time, excluded.best_time), COALESCE(excluded.best_time, best_time)),
+    best_score = MAX(COALESCE(best_score, excluded.best_score), COALESCE(excluded.best_score, best_score)),
+    wins = wins + excluded.wins,
+    runs = runs + 1
+"""
+
+SELECT_BEST = "SELECT best_time, best_score, wins, runs FROM level_bests WHERE level = ?"
+
+
+class Leaderboard:
+    """Records finished runs on a background thread and serves cached bests
+
+    record_run() and load() only queue work, so the game loop never waits
+    on the disk. The writer thread owns the database connection and
+    commits everything queued since its last pass in one transaction.
+    best() reads from an in-memory cache that load() fills ahead of time
+    (e.g. when a level starts) and that each recorded run updates at once.
+    """
+
+    def __init__(self, path=LEADERBOARD_FILE):
+        """
+        Args:
+            path: SQLite database file, created if missing
+        """
+        self.path = path
+        self.queue = queue.Queue()
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.last_error = None
+        self.thread = threading.Thread(target=self._run, name="leaderboard-writer", daemon=True)
+        self.thread.start()
+
+    # ----------------------
+    # Game loop side
+    # ----------------------
+    def record_run(self, level, outcome, time_taken, score):
+        """
+        Queue a finished run; returns immediately
+
+        Args:
+            level: Level name
+            outcome: "win" or "lose"
+            time_taken: Seconds played
+            score: Score at the end of the run
+        """
+        won = outcome == "win"
+        with self.lock:
+            best = self.cache.get(level)
+            if best is not None:
+                best_time, best_score, wins, runs = best
+                if won:
+                    best_time = time_taken if best_time is None else min(best_time, time_taken)
+                    best_score = score if best_score is None else max(best_score, score)
+                self.cache[level] = (best_time, best_score, wins + int(won), runs + 1)
+        self.queue.put(("run", level, outcome, time_taken, score, time.time()))
+
+    def load(self, level):
+        """Queue a read of a level's bests into the cache"""
+        self.queue.put(("load", level))
+
+    def best(self, level):
+        """
+        Cached bests of a level
+
+        Returns:
+            tuple (best_time, best_score, wins, runs) with None for a level
+            never won, or None if the level isn't cached yet
+        """
+        with self.lock:
+            return self.cache.get(level)
+
+    def flush(self):
+        """Block until everything queued so far is in the database"""
+        self.queue.join()
+
+    def close(self):
+        """Write what is queued, then stop the writer thread"""
+        self.queue.put(None)
+        self.thread.join()
+
+    # ----------------------
+    # Writer thread
+    # ----------------------
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        # WAL with NORMAL sync keeps commits cheap without risking corruption
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _take_batch(self):
+        """Wait for one item, then take whatever else is already queued"""
+        batch = [self.queue.get()]
+        while len(batch) < LEADERBOARD_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        try:
+            connection = self._connect()
+        except (OSError, sqlite3.Error) as e:
+            connection = None
+            self.last_error = e
+
+        running = True
+        while running:
+            batch = self._take_batch()
+            try:
+                if None in batch:
+                    running = False
+                    batch = [item for item in batch if item is not None]
+                if connection is not None and batch:
+                    self._process(connection, batch)
+                    self.last_error = None
+            except sqlite3.Error as e:
+                # Keep the game going; the failed batch is dropped
+                self.last_error = e
+            finally:
+                for _ in range(len(batch) + (0 if running else 1)):
+                    self.queue.task_done()
+
+        if connection is not None:
+            connection.close()
+
+    def _process(self, connection, batch):
+        runs = [item[1:] for item in batch if item[0] == "run"]
+        with connection:
+            connection.executemany(INSERT_RUN, runs)
+            connection.executemany(UPSERT_BEST, [
+                (level, time_taken, score, 1) if outcome == "win" else (level, None, None, 0)
+                for level, outcome, time_taken, score, _ in runs
+            ])
+
+        # Refresh every level this batch touched, now that the writes are in
+        levels = {item[1] for item in batch}
+        bests = {}
+        for level in levels:
+            row = connection.execute(SELECT_BEST, (level,)).fetchone()
+            bests[level] = tuple(row) if row else (None, None, 0, 0)
+        with self.lock:
+            self.cache.update(bests)
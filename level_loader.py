@@ -0,0 +1,110 @@
+"""
+Level Loader - Builds upcoming levels in the background and reads calibrated level settings
+"""
+
+import hashlib
+import json
+import threading
+from constants import LEVELS, LEVEL_TIMES_FILE
+from maze import Maze
+
+
+def layout_hash(layout):
+    """Short hash of a layout, so settings made for it are dropped once it changes"""
+    return hashlib.blake2b(json.dumps(layout, separators=(",", ":")).encode(), digest_size=8).hexdigest()
+
+
+def load_time_limits(path=LEVEL_TIMES_FILE):
+    """
+    Read the time limits written by calibrate_levels.py
+
+    Entries whose layout has changed since calibration are skipped, as is
+    a missing or unreadable file, so those levels keep their LEVELS time.
+
+    Returns:
+        dict: level name -> time limit in seconds
+    """
+    try:
+        with open(path) as f:
+            levels = json.load(f)["levels"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+    limits = {}
+    for level in LEVELS:
+        entry = levels.get(level["name"]) if isinstance(levels, dict) else None
+        if isinstance(entry, dict) and "maze" in level and entry.get("layout") == layout_hash(level["maze"]):
+            limits[level["name"]] = entry["time"]
+    return limits
+
+
+class LevelPreloader:
+    """Builds the Maze for a level on a worker thread so it can be swapped in instantly"""
+
+    def __init__(self):
+        self.level_index = None
+        self.maze = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def preload(self, level_index):
+        """
+        Start building a level in the background
+
+        Does nothing if the level is already built or being built, if the
+        index is outside LEVELS, or if the level is a streamed world.
+
+        Args:
+            level_index: Index into LEVELS
+        """
+        if not 0 <= level_index < len(LEVELS) or "maze" not in LEVELS[level_index]:
+            return
+        with self.lock:
+            if self.level_index == level_index:
+                return
+            self.level_index = level_index
+            self.maze = None
+
+        self.thread = threading.Thread(
+            target=self._build, args=(level_index,), name="level-preloader", daemon=True
+        )
+        self.thread.start()
+
+    def _build(self, level_index):
+        maze = Maze(LEVELS[level_index]["maze"])
+        maze.build_static_layers()
+
+        with self.lock:
+            # Drop the result if a different level was requested meanwhile
+            if self.level_index == level_index:
+                self.maze = maze
+
+    def take(self, level_index):
+        """
+        Hand over the preloaded Maze for a level
+
+        Args:
+            level_index: Index into LEVELS
+
+        Returns:
+            Maze if this level was preloaded, otherwise None. If the worker
+            is still running it is waited for, which is never slower than
+            building the level on the spot.
+        """
+        thread = self.thread
+        if self.level_index != level_index or thread is None:
+            return None
+        thread.join()
+
+        with self.lock:
+            maze = self.maze
+            self.level_index = None
+            self.maze = None
+            self.thread = None
+        return maze
+
+    def cancel(self):
+        """Forget any preloaded level"""
+        with self.lock:
+            self.level_index = None
+            self.maze = None
@@ -3,18 +3,34 @@ Escape the Maze! - Main Game Entry Point
 SWC3643 Python Programming Project
 """
 
+import logging
 import pygame
 import sys
+import time
 from game_manager import GameManager
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, WINDOW_TITLE
+from constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, FPS, WINDOW_TITLE, DEBUG,
+    SIMULATION_DT, MAX_FRAME_TIME, MAX_TICKS_PER_FRAME, SCALED_WINDOW, IDLE_WAIT_MS
+)
+
+logger = logging.getLogger(__name__)
 
 
 def main():
+    # Diagnostics go to the console only in debug mode
+    logging.basicConfig(level=logging.DEBUG if DEBUG else logging.WARNING,
+                        format="%(levelname)s %(name)s: %(message)s")
+
+    # Startup timing (reported once the first frame is on screen)
+    start_time = time.perf_counter()
+    first_frame = True
+
     # Initialize Pygame
     pygame.init()
 
-    # Set up the display
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    # Set up the display; a scaled window keeps rendering at the game's own resolution
+    flags = pygame.SCALED | pygame.RESIZABLE if SCALED_WINDOW else 0
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), flags)
     pygame.display.set_caption(WINDOW_TITLE)
 
     # Create clock for FPS control
@@ -23,29 +39,68 @@ def main():
     # Create game manager instance
     game_manager = GameManager(screen)
 
-    # Main game loop
+    # Main game loop: the simulation advances in fixed SIMULATION_DT ticks
+    # driven by real elapsed time, rendering happens once per frame
     running = True
+    previous_time = time.perf_counter()
+    accumulator = 0.0
     while running:
+        # On static screens, sleep until input arrives rather than redrawing
+        # the same frame; one tick then handles whatever came in
+        idle = not first_frame and game_manager.is_idle()
+        if idle:
+            event = pygame.event.wait(IDLE_WAIT_MS)
+            events = [] if event.type == pygame.NOEVENT else [event] + pygame.event.get()
+            previous_time = time.perf_counter() - SIMULATION_DT
+        else:
+            events = pygame.event.get()
+
+        now = time.perf_counter()
+        # Clamp huge gaps (window drag, debugger) instead of fast-forwarding
+        accumulator += min(now - previous_time, MAX_FRAME_TIME)
+        previous_time = now
+
         # Handle events
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
             else:
                 game_manager.handle_event(event)
 
         # Update game state
-        game_manager.update()
+        ticks = 0
+        while accumulator >= SIMULATION_DT and ticks < MAX_TICKS_PER_FRAME:
+            game_manager.update()
+            accumulator -= SIMULATION_DT
+            ticks += 1
+        if ticks == MAX_TICKS_PER_FRAME:
+            # Too far behind to catch up; drop the backlog
+            accumulator = min(accumulator, SIMULATION_DT)
+
+        # An idle wait that timed out changed nothing on screen
+        if idle and not events:
+            continue
 
-        # Draw everything
-        game_manager.draw()
+        # Draw everything, interpolated between the last two ticks
+        game_manager.draw(accumulator / SIMULATION_DT)
 
         # Update display
         pygame.display.flip()
 
-        # Maintain frame rate
+        # Frame work time, before the frame cap sleeps, picks the render quality
+        if not idle:
+            game_manager.quality.record(time.perf_counter() - now)
+
+        if first_frame:
+            first_frame = False
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            logger.debug("Time to first frame: %.1f ms", elapsed_ms)
+
+        # Cap the render frame rate
         clock.tick(FPS)
 
     # Quit game
+    game_manager.shutdown()
     pygame.quit()
     sys.exit()
 
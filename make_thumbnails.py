@@ -0,0 +1,208 @@
+"""
+Level Thumbnails - Renders preview images of levels into a content-addressed cache
+
+Usage:
+    python make_thumbnails.py [layout .json files] [--out thumbnails] [--tile 7] [--workers N]
+
+Without files, every in-memory level in LEVELS is rendered. A .json file
+holds one layout (a list of rows), one level ({"name": ..., "maze": ...})
+or a list of levels.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from constants import (
+    LEVELS, THUMBNAIL_DIR, THUMBNAIL_TILE_SIZE, PLAYER_COLOR, ENEMY_COLOR, COLLECTIBLE_COLOR
+)
+
+# Bump when the look of levels changes, so every cached thumbnail is redrawn
+THUMBNAIL_VERSION = 3
+
+# Round markers for the player, enemies and collectibles
+MARKER_COLORS = {2: PLAYER_COLOR, 4: ENEMY_COLOR, 5: COLLECTIBLE_COLOR}
+
+
+def layout_key(layout, tile_size=THUMBNAIL_TILE_SIZE):
+    """
+    Hash of everything a thumbnail depends on
+
+    Returns:
+        str: Hex digest naming the thumbnail in the cache
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{THUMBNAIL_VERSION}:{tile_size}:".encode())
+    digest.update(json.dumps(layout, separators=(",", ":")).encode())
+    return digest.hexdigest()
+
+
+def thumbnail_path(layout, out_dir=THUMBNAIL_DIR, tile_size=THUMBNAIL_TILE_SIZE):
+    """Where the thumbnail of a layout lives in the cache (it may not exist yet)"""
+    key = layout_key(layout, tile_size)
+    return os.path.join(out_dir, key[:2], f"{key}.png")
+
+
+def load_levels(paths):
+    """
+    Levels to render, from LEVELS or from .json files
+
+    Returns:
+        list of (name, layout)
+    """
+    if not paths:
+        return [(level["name"], level["maze"]) for level in LEVELS if "maze" in level]
+
+    levels = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            continue
+        base = os.path.splitext(os.path.basename(path))[0]
+        if isinstance(data, dict):
+            data = [data]
+        elif not isinstance(data, list):
+            print(f"Skipping {path}: not a layout, level or list of levels", file=sys.stderr)
+            continue
+        elif data and isinstance(data[0], list) and data[0] and isinstance(data[0][0], int):
+            data = [{"name": base, "maze": data}]
+        for index, level in enumerate(data):
+            # Malformed entries are skipped like unreadable files, not fatal to the batch
+            if not isinstance(level, dict) or "maze" not in level:
+                print(f"Skipping {path} entry {index}: not a level with a \"maze\" layout", file=sys.stderr)
+                continue
+            name = level.get("name") or f"{base}#{index}"
+            levels.append((name, level["maze"]))
+    return levels
+
+
+def _init_worker():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+
+def render_thumbnail(task):
+    """
+    Draw one layout at the thumbnail's tile size and save it (runs in a worker process)
+
+    Background, walls and exit come from the same drawing helpers as the
+    game's levels, given tiles of tile_size pixels, so no full-size level
+    is built or scaled down.
+
+    Returns:
+        str path written, or None if the layout couldn't be rendered
+    """
+    import pygame
+    from maze import draw_background, draw_wall, draw_exit
+
+    layout, path, tile_size = task
+    try:
+        width = max((len(row) for row in layout), default=0)
+        surface = pygame.Surface((width * tile_size, len(layout) * tile_size))
+        draw_background(surface)
+
+        radius = max(1, tile_size * 2 // 5)
+        for row_idx, row in enumerate(layout):
+            for col_idx, cell in enumerate(row):
+                rect = pygame.Rect(col_idx * tile_size, row_idx * tile_size, tile_size, tile_size)
+                if cell == 1:
+                    draw_wall(surface, rect)
+                elif cell == 3:
+                    draw_exit(surface, rect)
+                elif cell in MARKER_COLORS:
+                    pygame.draw.circle(surface, MARKER_COLORS[cell], rect.center, radius)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write under a temporary name so a half-written file is never cached
+        temp_path = f"{path}.{os.getpid()}.tmp.png"
+        pygame.image.save(surface, temp_path)
+        os.replace(temp_path, path)
+        return path
+    except (pygame.error, ValueError, TypeError, OSError) as e:
+        print(f"Can't render {path}: {e}", file=sys.stderr)
+        return None
+
+
+def build_thumbnails(levels, out_dir=THUMBNAIL_DIR, tile_size=THUMBNAIL_TILE_SIZE, workers=None):
+    """
+    Render the thumbnails missing from the cache and index all of them
+
+    Args:
+        levels: (name, layout) pairs
+        out_dir: Cache folder; its index.json maps level names to files
+        tile_size: Pixels per tile
+        workers: Worker processes (default: all cores)
+
+    Returns:
+        tuple: (index dict name -> path, number of thumbnails rendered)
+    """
+    index = {}
+    tasks = {}
+    for name, layout in levels:
+        path = thumbnail_path(layout, out_dir, tile_size)
+        index[name] = path
+        # Identical layouts share one file, and cached ones are never redrawn
+        if path not in tasks and not os.path.exists(path):
+            tasks[path] = (layout, path, tile_size)
+
+    rendered = 0
+    if tasks:
+        chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for path in pool.map(render_thumbnail, tasks.values(), chunksize=chunksize):
+                if path:
+                    rendered += 1
+
+    index = {name: path for name, path in index.items() if os.path.exists(path)}
+    _update_index(out_dir, index)
+    return index, rendered
+
+
+def _update_index(out_dir, index):
+    """Merge names into index.json, keeping entries from earlier runs"""
+    os.makedirs(out_dir, exist_ok=True)
+    index_path = os.path.join(out_dir, "index.json")
+    try:
+        with open(index_path) as f:
+            merged = json.load(f)
+    except (OSError, ValueError):
+        merged = {}
+    merged.update({name: os.path.relpath(path, out_dir) for name, path in index.items()})
+    with open(f"{index_path}.tmp", "w") as f:
+        json.dump(merged, f, indent=1)
+    os.replace(f"{index_path}.tmp", index_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render level thumbnails into a content-addressed cache")
+    parser.add_argument("files", nargs="*", help="layout .json files (default: the built-in levels)")
+    parser.add_argument("--out", default=THUMBNAIL_DIR, help="cache folder for the thumbnails")
+    parser.add_argument("--tile", type=int, default=THUMBNAIL_TILE_SIZE, help="pixels per tile")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    levels = load_levels(args.files)
+    if not levels:
+        print("No levels to render")
+        return
+
+    start = time.perf_counter()
+    index, rendered = build_thumbnails(levels, args.out, args.tile, args.workers)
+    print(f"{len(index)} thumbnails, {rendered} rendered, in {time.perf_counter() - start:.1f}s "
+          f"(index: {os.path.join(args.out, 'index.json')})")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,69 @@ Maze Class - Enhanced visuals with gradients and shadows
 """
 
 import pygame
-from constants import TILE_SIZE, BLACK, DARK_GRAY, CYAN, DARK_BLUE, LIGHT_BLUE, WHITE
+from constants import (
+    TILE_SIZE, BLACK, DARK_GRAY, CYAN, DARK_BLUE, LIGHT_BLUE, WHITE,
+    WALL_COLOR, WALL_EDGE_COLOR, WALL_HIGHLIGHT_COLOR, EXIT_COLOR, EXIT_OPEN_COLOR,
+    SCREEN_WIDTH, SCREEN_HEIGHT, ENEMY_VISIT_DECAY_TICKS,
+    ENEMY_CHASE_DISTANCE, PERCEPTION_CELL_TILES, QUALITY_FLAT, QUALITY_FULL
+)
+from visit_grid import VisitGrid
+from fov import FieldOfView
+from pathfinding import HierarchicalPathfinder
 from player import Player
 from enemy import Enemy
 from collectible import Collectible
 
 
+def draw_background(surface):
+    """Fill a surface with the level background gradient"""
+    width, height = surface.get_size()
+    for y in range(0, height, 2):
+        ratio = y / height
+        color = (
+            int(DARK_BLUE[0] * (1 - ratio)),
+            int(DARK_BLUE[1] * (1 - ratio)),
+            int(DARK_BLUE[2] * (1 - ratio) + 20 * ratio)
+        )
+        pygame.draw.line(surface, color, (0, y), (width, y))
+
+
+def draw_wall(surface, rect, flat=False):
+    """
+    Draw one wall tile; shadow, edge and highlight scale with the tile
+
+    Args:
+        surface: Target surface
+        rect: The tile's rect, TILE_SIZE wide in the game
+        flat: Plain colour only (QUALITY_FLAT)
+    """
+    if flat:
+        pygame.draw.rect(surface, WALL_COLOR, rect)
+        return
+    shadow = round(3 * rect.w / TILE_SIZE)
+    edge = max(1, round(2 * rect.w / TILE_SIZE))
+    pygame.draw.rect(surface, BLACK, rect.move(shadow, shadow))
+    pygame.draw.rect(surface, WALL_COLOR, rect)
+    pygame.draw.rect(surface, WALL_EDGE_COLOR, rect, edge)
+    highlight = rect.inflate(-2 * edge, -2 * edge)
+    if highlight.w > 2:
+        pygame.draw.rect(surface, WALL_HIGHLIGHT_COLOR, highlight, 1)
+
+
+def draw_exit(surface, rect, unlocked=False):
+    """Draw the exit tile (without its label); the border scales with the tile"""
+    radius = 5 * rect.w // TILE_SIZE
+    border = max(1, round(3 * rect.w / TILE_SIZE))
+    pygame.draw.rect(surface, EXIT_OPEN_COLOR if unlocked else EXIT_COLOR, rect, border_radius=radius)
+    pygame.draw.rect(surface, WHITE, rect, border, border_radius=radius)
+
+
 class Maze:
     """Maze with enhanced visual effects"""
 
+    # Built whole in memory (see world_chunks.ChunkedWorld for streamed levels)
+    streaming = False
+
     def __init__(self, maze_layout):
         self.layout = maze_layout
         self.walls = []
@@ -20,13 +74,39 @@ class Maze:
         self.collectibles = []
         self.exit_rect = None
         self.exit_unlocked = False
+        self.ticks = 0
+        self.width = 0
+        self.height = 0
+        self.wall_grid = None
+        self.visits = None
+        self.fov = None
+        self.pathfinder = None
+        # Perception broadphase: enemies bucketed by coarse grid cell, kept
+        # up to date by the enemies themselves as they change tile
+        self.enemy_buckets = {}
+        self.enemy_cells = {}
+        self.static_layer = None
+        self.static_flat = False
+        self.exit_text = None
+        self.snapshot = None
         self._parse_layout()
+        self.snapshot = self.take_snapshot()
 
     def _parse_layout(self):
         self.walls = []
         self.enemies = []
         self.collectibles = []
 
+        self.width = max((len(row) for row in self.layout), default=0)
+        self.height = len(self.layout)
+        # Row-major wall flags for tile lookups (visibility, navigation)
+        self.wall_grid = bytearray(self.width * self.height)
+        # Cluster data is built once the grid is filled in below
+        self.pathfinder = HierarchicalPathfinder(self.wall_grid, self.width, self.height)
+
+        # Patrol memory shared by all enemies of this level
+        self.visits = VisitGrid(self.width, self.height)
+
         for row_idx, row in enumerate(self.layout):
             for col_idx, cell in enumerate(row):
                 x = col_idx * TILE_SIZE
@@ -35,26 +115,123 @@ class Maze:
                 if cell == 1:
                     wall_rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
                     self.walls.append(wall_rect)
+                    self.wall_grid[row_idx * self.width + col_idx] = 1
                 elif cell == 2:
                     self.player = Player(col_idx, row_idx)
                 elif cell == 3:
                     self.exit_rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
                 elif cell == 4:
-                    enemy = Enemy(col_idx, row_idx)
+                    enemy = Enemy(col_idx, row_idx, self.visits, self.pathfinder, self._enemy_moved)
                     self.enemies.append(enemy)
                 elif cell == 5:
                     collectible = Collectible(col_idx, row_idx)
                     self.collectibles.append(collectible)
 
-    def update(self):
+        # Precomputed here (on the preloader thread when the level is preloaded)
+        # so no enemy's walk home pays for it during play
+        self.pathfinder.build()
+
+        # What the player can see, shared by every enemy's line-of-sight check
+        self.fov = FieldOfView(self.wall_grid, self.width, self.height)
+
+        self.enemy_buckets = {}
+        self.enemy_cells = {}
+        for enemy in self.enemies:
+            self._enemy_moved(enemy)
+
+    def _enemy_moved(self, enemy):
+        """Move an enemy that changed tile to its new bucket, if its coarse cell changed"""
+        cell = (enemy.grid_x // PERCEPTION_CELL_TILES, enemy.grid_y // PERCEPTION_CELL_TILES)
+        old_cell = self.enemy_cells.get(enemy)
+        if cell != old_cell:
+            if old_cell is not None:
+                self.enemy_buckets[old_cell].discard(enemy)
+            self.enemy_buckets.setdefault(cell, set()).add(enemy)
+            self.enemy_cells[enemy] = cell
+
+    def _enemies_near(self, x, y):
+        """
+        Collect enemies in cells that reach within chase distance of a pixel position
+
+        Only the buckets around the position are visited, so the cost
+        follows how crowded the area is, not the level's enemy count.
+
+        Returns:
+            set of the enemies that may see the player
+        """
+        near = set()
+        reach = ENEMY_CHASE_DISTANCE // TILE_SIZE + 1
+        tile_x = int(x // TILE_SIZE)
+        tile_y = int(y // TILE_SIZE)
+        buckets = self.enemy_buckets
+        for cell_y in range((tile_y - reach) // PERCEPTION_CELL_TILES, (tile_y + reach) // PERCEPTION_CELL_TILES + 1):
+            for cell_x in range((tile_x - reach) // PERCEPTION_CELL_TILES, (tile_x + reach) // PERCEPTION_CELL_TILES + 1):
+                bucket = buckets.get((cell_x, cell_y))
+                if bucket:
+                    near.update(bucket)
+        return near
+
+    def take_snapshot(self):
+        """
+        Capture the restorable state of every entity
+
+        Returns:
+            tuple: (player grid position, enemy (grid x, grid y, state) tuples,
+            collectible collected flags)
+        """
+        player_state = (self.player.grid_x, self.player.grid_y) if self.player else None
+        enemy_states = tuple((e.grid_x, e.grid_y, e.state) for e in self.enemies)
+        collected = tuple(c.collected for c in self.collectibles)
+        return player_state, enemy_states, collected
+
+    def restore_snapshot(self, snapshot):
+        """
+        Put every entity back to a snapshot, reusing the existing objects
+
+        Args:
+            snapshot: Tuple returned by take_snapshot()
+        """
+        player_state, enemy_states, collected = snapshot
+
+        if self.player and player_state:
+            self.player.reset(*player_state)
+
+        self.visits.clear()
+        self.ticks = 0
+        for enemy, (grid_x, grid_y, state) in zip(self.enemies, enemy_states):
+            enemy.reset()
+            if (grid_x, grid_y) != (enemy.start_x, enemy.start_y):
+                enemy.place(grid_x, grid_y)
+            enemy.state = state
+
+        for collectible, was_collected in zip(self.collectibles, collected):
+            collectible.reset()
+            collectible.collected = was_collected
+
+        self.exit_unlocked = all(collected)
+
+    def update(self, keys=None):
+        """
+        Advance one simulation tick
+
+        Args:
+            keys: Key state indexable by pygame key constants, as returned by
+                pygame.key.get_pressed() (default: read the keyboard)
+        """
         if self.player:
-            keys = pygame.key.get_pressed()
+            if keys is None:
+                keys = pygame.key.get_pressed()
             self.player.handle_input(keys)
             self.player.update(self.walls)
 
+            # Recomputed only when the player changes tile
+            self.fov.update(self.player.grid_x, self.player.grid_y)
+
+            # Only enemies near the player need to run detection
             player_pos = self.player.get_position()
+            near = self._enemies_near(*player_pos)
             for enemy in self.enemies:
-                enemy.update(player_pos, self.walls)
+                enemy.update(player_pos, self.walls, self.fov, perceive=enemy in near)
 
             player_rect = self.player.get_rect()
             for collectible in self.collectibles:
@@ -63,6 +240,11 @@ class Maze:
 
             self.exit_unlocked = all(c.collected for c in self.collectibles)
 
+            # Let old patrol history fade so enemies keep roaming
+            self.ticks += 1
+            if ENEMY_VISIT_DECAY_TICKS and self.ticks % ENEMY_VISIT_DECAY_TICKS == 0:
+                self.visits.decay()
+
     def check_player_enemy_collision(self):
         if self.player:
             player_rect = self.player.get_rect()
@@ -84,68 +266,65 @@ class Maze:
     def get_total_collectibles(self):
         return len(self.collectibles)
 
-    def draw(self, screen):
-        # Draw background gradient
-        for y in range(0, screen.get_height(), 2):
-            ratio = y / screen.get_height()
-            color = (
-                int(DARK_BLUE[0] * (1 - ratio)),
-                int(DARK_BLUE[1] * (1 - ratio)),
-                int(DARK_BLUE[2] * (1 - ratio) + 20 * ratio)
-            )
-            pygame.draw.line(screen, color, (0, y), (screen.get_width(), y))
-
-        # Draw walls with depth
+    def build_static_layers(self, size=(SCREEN_WIDTH, SCREEN_HEIGHT), quality=QUALITY_FULL):
+        """
+        Pre-render everything that never changes during a level
+
+        The background gradient and walls are drawn once onto an off-screen
+        surface, which draw() then blits in a single call. Only plain
+        software surfaces are used, so this may run on a loader thread.
+
+        Args:
+            size: Size (width, height) of the target screen
+            quality: Render quality tier; QUALITY_FLAT draws plain colours
+        """
+        layer = pygame.Surface(size)
+        self.static_flat = quality == QUALITY_FLAT
+
+        if self.static_flat:
+            layer.fill(DARK_BLUE)
+        else:
+            draw_background(layer)
+
+        # Walls with depth (shadow, edge and highlight) unless flat
         for wall in self.walls:
-            # Shadow
-            shadow_rect = wall.copy()
-            shadow_rect.x += 3
-            shadow_rect.y += 3
-            pygame.draw.rect(screen, BLACK, shadow_rect)
+            draw_wall(layer, wall, self.static_flat)
 
-            # Main wall with gradient
-            pygame.draw.rect(screen, (80, 80, 100), wall)
-            pygame.draw.rect(screen, (120, 120, 140), wall, 2)
+        self.static_layer = layer
 
-            # Highlight
-            highlight = pygame.Rect(wall.x + 2, wall.y + 2, wall.w - 4, wall.h - 4)
-            pygame.draw.rect(screen, (100, 100, 120), highlight, 1)
+    def draw(self, screen, alpha=1.0, quality=QUALITY_FULL):
+        # Background and walls come from the cached static layer
+        if (self.static_layer is None or self.static_layer.get_size() != screen.get_size()
+                or self.static_flat != (quality == QUALITY_FLAT)):
+            self.build_static_layers(screen.get_size(), quality)
+        screen.blit(self.static_layer, (0, 0))
 
         # Draw exit with glow
         if self.exit_rect:
-            if self.exit_unlocked:
-                # Glow effect
+            # Glow effect (unlocked exit, full quality only)
+            if self.exit_unlocked and quality == QUALITY_FULL:
                 for i in range(3):
                     glow_rect = self.exit_rect.inflate(i * 6, i * 6)
                     glow_surf = pygame.Surface((glow_rect.w, glow_rect.h), pygame.SRCALPHA)
-                    alpha = 60 - i * 15
-                    pygame.draw.rect(glow_surf, (0, 255, 0, alpha), glow_surf.get_rect(), border_radius=5)
+                    glow_alpha = 60 - i * 15
+                    pygame.draw.rect(glow_surf, (0, 255, 0, glow_alpha), glow_surf.get_rect(), border_radius=5)
                     screen.blit(glow_surf, glow_rect)
 
-                color = (0, 220, 0)
-            else:
-                color = (100, 100, 100)
-
-            pygame.draw.rect(screen, color, self.exit_rect, border_radius=5)
-            pygame.draw.rect(screen, WHITE, self.exit_rect, 3, border_radius=5)
+            draw_exit(screen, self.exit_rect, self.exit_unlocked)
 
-            font = pygame.font.Font(None, 20)
-            text = font.render("EXIT", True, WHITE)
-            text_rect = text.get_rect(center=self.exit_rect.center)
-            screen.blit(text, text_rect)
+            if self.exit_text is None:
+                font = pygame.font.Font(None, 20)
+                self.exit_text = font.render("EXIT", True, WHITE)
+            text_rect = self.exit_text.get_rect(center=self.exit_rect.center)
+            screen.blit(self.exit_text, text_rect)
 
-        # Draw collectibles
-        for collectible in self.collectibles:
-            collectible.draw(screen)
-
-        # Draw enemies
-        for enemy in self.enemies:
-            enemy.draw(screen)
-
-        # Draw player
+        # Entities: one batched blit call per layer
+        stars = [collectible.get_sprite() for collectible in self.collectibles]
+        screen.blits([sprite for sprite in stars if sprite], doreturn=False)
+        screen.blits([enemy.get_sprite(alpha) for enemy in self.enemies], doreturn=False)
         if self.player:
-            self.player.draw(screen)
+            screen.blit(*self.player.get_sprite(alpha))
 
     def reset(self):
-        self._parse_layout()
-        self.exit_unlocked = False
\ No newline at end of file
+        """Restart the level in place from its initial snapshot"""
+        self.restore_snapshot(self.snapshot)
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Maze Environment - Gym-style batched API for training agents against the levels
+"""
+
+import random
+import numpy as np
+import pygame
+from constants import LEVELS, COLLECT_POINTS, OBSERVATION_VIEW_RADIUS
+from maze import Maze
+from enemy import ENEMY_STATES
+from observation import GridObserver
+from level_loader import load_time_limits
+from game_manager import step_level, win_bonus
+
+# Actions are indices into ACTIONS; -1 means "press nothing"
+ACTIONS = ("up", "down", "left", "right")
+ACTION_KEYS = (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT)
+
+# info["outcome"] codes
+OUTCOMES = (None, "win", "time", "caught")
+
+# Observation modes
+OBSERVATIONS = ("vector", "grid", "view")
+
+
+class _Keys(dict):
+    """Key state holding only the pressed keys; every other key reads as released"""
+
+    def __missing__(self, key):
+        return False
+
+
+NO_KEYS = _Keys()
+ACTION_KEY_STATES = tuple(_Keys({key: True}) for key in ACTION_KEYS)
+
+
+class VectorMazeEnv:
+    """N independent copies of one level, stepped in lockstep
+
+    Each step applies one action per copy for frame_skip simulation ticks,
+    using the same tick and scoring rules as GameManager. Copies that end
+    (win, time up or caught) are reset straight away, so the returned
+    observation for them is the first one of their next episode.
+
+    Observations per copy:
+        "vector": float32 player tile x, y, fraction of time left, exit
+            unlocked, then tile x, y and ENEMY_STATES index for every
+            enemy, then a collected flag for every collectible
+        "grid": uint8 (channels, height, width) planes of the whole level
+            (see observation.CHANNELS)
+        "view": the same planes cropped to view_radius around the player
+
+    Grid and view observations are written into one preallocated batch
+    array that every step reuses; copy it to keep an observation.
+    """
+
+    def __init__(self, num_envs, level_index=0, frame_skip=1, observation="vector",
+                 view_radius=OBSERVATION_VIEW_RADIUS):
+        """
+        Args:
+            num_envs: Number of level copies
+            level_index: Index into LEVELS (must be a "maze" level)
+            frame_skip: Simulation ticks per step
+            observation: "vector", "grid" or "view"
+            view_radius: Tiles around the player in "view" observations
+        """
+        if observation not in OBSERVATIONS:
+            raise ValueError(f"Unknown observation mode: {observation}")
+        level = LEVELS[level_index]
+        self.num_envs = num_envs
+        self.frame_skip = frame_skip
+        self.time_limit = float(load_time_limits().get(level["name"], level["time"]))
+        self.mazes = [Maze(level["maze"]) for _ in range(num_envs)]
+        self.timers = [self.time_limit] * num_envs
+        self.collected = [0] * num_envs
+
+        first = self.mazes[0]
+        self.enemy_count = len(first.enemies)
+        self.collectible_count = len(first.collectibles)
+        self.observation_size = 4 + 3 * self.enemy_count + self.collectible_count
+        self.action_count = len(ACTIONS)
+
+        self.observation = observation
+        self.observers = []
+        self.observations = None
+        if observation != "vector":
+            radius = view_radius if observation == "view" else 0
+            self.observers = [GridObserver(maze, radius) for maze in self.mazes]
+            first = self.observers[0]
+            shape = first.view_shape if observation == "view" else first.grid.shape
+            self.observations = np.zeros((num_envs,) + shape, dtype=np.uint8)
+
+    def reset(self, seed=None):
+        """
+        Restart every copy
+
+        Args:
+            seed: Seeds the random module that drives enemy patrols
+
+        Returns:
+            np.ndarray: Batch of observations, one per copy
+        """
+        if seed is not None:
+            random.seed(seed)
+        for index in range(self.num_envs):
+            self._reset_env(index)
+        return self._observe()
+
+    def step(self, actions):
+        """
+        Apply one action per copy
+
+        Args:
+            actions: num_envs action indices (see ACTIONS, -1 for none)
+
+        Returns:
+            tuple: (observations, rewards, dones, info) where rewards are
+            the points scored this step and info["outcome"] holds
+            OUTCOMES indices for copies that just finished
+        """
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        outcomes = np.zeros(self.num_envs, dtype=np.int8)
+
+        for index, action in enumerate(np.asarray(actions).tolist()):
+            maze = self.mazes[index]
+            keys = ACTION_KEY_STATES[action] if action >= 0 else NO_KEYS
+            timer = self.timers[index]
+            reward = 0
+            outcome = None
+
+            for _ in range(self.frame_skip):
+                timer, outcome = step_level(maze, timer, keys)
+                collected = maze.get_collected_count()
+                if collected > self.collected[index]:
+                    reward += COLLECT_POINTS
+                    self.collected[index] = collected
+                if outcome:
+                    break
+
+            if outcome == "win":
+                reward += win_bonus(timer)
+            rewards[index] = reward
+            self.timers[index] = timer
+            if outcome:
+                dones[index] = True
+                outcomes[index] = OUTCOMES.index(outcome)
+                self._reset_env(index)
+
+        return self._observe(), rewards, dones, {"outcome": outcomes}
+
+    def _reset_env(self, index):
+        self.mazes[index].reset()
+        self.timers[index] = self.time_limit
+        self.collected[index] = 0
+
+    def _observe(self):
+        if self.observers:
+            view = self.observation == "view"
+            for observer, out in zip(self.observers, self.observations):
+                observer.update()
+                out[...] = observer.view() if view else observer.grid
+            return self.observations
+
+        rows = []
+        for maze, timer in zip(self.mazes, self.timers):
+            player = maze.player
+            row = [player.grid_x, player.grid_y, timer / self.time_limit, maze.exit_unlocked]
+            for enemy in maze.enemies:
+                row += (enemy.grid_x, enemy.grid_y, ENEMY_STATES.index(enemy.state))
+            row += [collectible.collected for collectible in maze.collectibles]
+            rows.append(row)
+        return np.array(rows, dtype=np.float32).reshape(self.num_envs, self.observation_size)
@@ -0,0 +1,132 @@
+"""
+Grid Observations - Symbolic multi-channel view of a level for agents and analysis
+"""
+
+import numpy as np
+from constants import TILE_SIZE, OBSERVATION_VIEW_RADIUS
+
+# One uint8 plane per channel; enemy planes count enemies on a tile
+CHANNELS = ("wall", "player", "patrol", "chase", "return", "star", "exit_locked", "exit_unlocked")
+WALL, PLAYER, PATROL, CHASE, RETURN, STAR, EXIT_LOCKED, EXIT_UNLOCKED = range(len(CHANNELS))
+
+ENEMY_CHANNELS = {"patrol": PATROL, "chase": CHASE, "return": RETURN}
+
+
+class GridObserver:
+    """Keeps a (channels, height, width) uint8 tensor in step with a Maze
+
+    The tensor is allocated and filled once; update() then only moves the
+    marks of entities that changed since the last call (the player's tile,
+    each enemy's tile and state, collected stars and the exit lock), so a
+    tick costs a few array writes instead of a rebuild. That diff also
+    covers Maze.reset() and rewinds.
+
+    The grid sits inside a border of wall tiles radius wide, so view()
+    can return the crop around the player as a plain slice.
+    """
+
+    def __init__(self, maze, radius=OBSERVATION_VIEW_RADIUS):
+        """
+        Args:
+            maze: An in-memory Maze (streamed worlds have no full grid)
+            radius: Tiles around the player in view(); 0 for the full grid only
+        """
+        self.maze = maze
+        self.radius = radius
+        self.width = maze.width
+        self.height = maze.height
+        self.padded = np.zeros((len(CHANNELS), self.height + 2 * radius, self.width + 2 * radius),
+                               dtype=np.uint8)
+        self.grid = self.padded[:, radius:radius + self.height, radius:radius + self.width]
+
+        self.star_tiles = [(int(c.x // TILE_SIZE), int(c.y // TILE_SIZE)) for c in maze.collectibles]
+        self.exit_tile = None
+        if maze.exit_rect:
+            self.exit_tile = (maze.exit_rect.x // TILE_SIZE, maze.exit_rect.y // TILE_SIZE)
+
+        self.player_tile = None
+        self.enemy_marks = []
+        self.star_flags = []
+        self.exit_channel = None
+        self.rebuild()
+
+    @property
+    def view_shape(self):
+        size = 2 * self.radius + 1
+        return (len(CHANNELS), size, size)
+
+    def rebuild(self):
+        """Fill the tensor from scratch (e.g. after walls changed)"""
+        maze = self.maze
+        self.padded.fill(0)
+        self.padded[WALL] = 1
+        self.grid[WALL] = np.frombuffer(maze.wall_grid, dtype=np.uint8).reshape(self.height, self.width)
+
+        self.player_tile = None
+        if maze.player:
+            self.player_tile = (maze.player.grid_x, maze.player.grid_y)
+            self.grid[PLAYER, self.player_tile[1], self.player_tile[0]] = 1
+
+        self.enemy_marks = []
+        for enemy in maze.enemies:
+            mark = (ENEMY_CHANNELS[enemy.state], enemy.grid_y, enemy.grid_x)
+            self.grid[mark] += 1
+            self.enemy_marks.append(mark)
+
+        self.star_flags = []
+        for (x, y), collectible in zip(self.star_tiles, maze.collectibles):
+            self.grid[STAR, y, x] = not collectible.collected
+            self.star_flags.append(collectible.collected)
+
+        self.exit_channel = None
+        if self.exit_tile:
+            self.exit_channel = EXIT_UNLOCKED if maze.exit_unlocked else EXIT_LOCKED
+            self.grid[self.exit_channel, self.exit_tile[1], self.exit_tile[0]] = 1
+
+    def update(self):
+        """Apply what changed in the maze since the last update"""
+        maze = self.maze
+        grid = self.grid
+
+        player = maze.player
+        if player:
+            tile = (player.grid_x, player.grid_y)
+            if tile != self.player_tile:
+                if self.player_tile:
+                    grid[PLAYER, self.player_tile[1], self.player_tile[0]] = 0
+                grid[PLAYER, tile[1], tile[0]] = 1
+                self.player_tile = tile
+
+        marks = self.enemy_marks
+        for index, enemy in enumerate(maze.enemies):
+            mark = (ENEMY_CHANNELS[enemy.state], enemy.grid_y, enemy.grid_x)
+            if mark != marks[index]:
+                grid[marks[index]] -= 1
+                grid[mark] += 1
+                marks[index] = mark
+
+        flags = self.star_flags
+        for index, collectible in enumerate(maze.collectibles):
+            if collectible.collected != flags[index]:
+                x, y = self.star_tiles[index]
+                grid[STAR, y, x] = not collectible.collected
+                flags[index] = collectible.collected
+
+        if self.exit_tile:
+            channel = EXIT_UNLOCKED if maze.exit_unlocked else EXIT_LOCKED
+            if channel != self.exit_channel:
+                x, y = self.exit_tile
+                grid[self.exit_channel, y, x] = 0
+                grid[channel, y, x] = 1
+                self.exit_channel = channel
+
+    def view(self):
+        """
+        The crop centred on the player; tiles past the edge read as wall
+
+        Returns:
+            np.ndarray view of shape view_shape, valid until the next update
+        """
+        x, y = self.player_tile or (0, 0)
+        size = 2 * self.radius + 1
+        return self.padded[:, y:y + size, x:x + size]
@@ -0,0 +1,468 @@
+"""
+Pathfinding - Hierarchical A* (HPA*) over the maze grid
+"""
+
+import heapq
+from collections import OrderedDict
+from constants import PATH_CLUSTER_SIZE, PATH_CACHE_SIZE
+
+# Border runs at least this long get an entrance at each end instead of one in the middle
+ENTRANCE_SPLIT = 6
+
+# bytes.translate table turning wall flags into binary digits, "1" for open tiles
+OPEN_DIGITS = b"1" + b"0" * 255
+
+START = -1
+GOAL = -2
+
+
+class HierarchicalPathfinder:
+    """Shortest-ish 4-connected paths on large grids via a cluster abstraction
+
+    The grid is cut into square clusters. Where two neighbouring clusters
+    share open tiles along their border, entrance tiles are placed on both
+    sides. Each cluster stores the walking distances between its own
+    entrance tiles. A query searches this small abstract graph with A*,
+    then refines each abstract hop with a BFS confined to one cluster.
+    Searches inside a cluster run on a bitboard of its open tiles.
+
+    build() precomputes every cluster, so queries never pay for it; a
+    changed tile rebuilds only its cluster and the four around it.
+    Finished paths are kept in an LRU cache keyed by (start, goal) and
+    dropped when a cluster they pass through changes.
+    """
+
+    def __init__(self, wall_grid, width, height, cluster_size=PATH_CLUSTER_SIZE,
+                 cache_size=PATH_CACHE_SIZE):
+        """
+        Args:
+            wall_grid: Row-major bytearray, non-zero for wall tiles
+            width: Grid width in tiles
+            height: Grid height in tiles
+            cluster_size: Cluster edge length in tiles
+            cache_size: Number of paths kept in the LRU cache
+        """
+        self.wall_grid = wall_grid
+        self.width = width
+        self.height = height
+        self.cluster_size = cluster_size
+        self.clusters_x = (width + cluster_size - 1) // cluster_size
+        self.clusters_y = (height + cluster_size - 1) // cluster_size
+
+        # Border key -> [(tile on first side, tile on second side)]
+        self.borders = {}
+        # Cluster -> {entrance tile: [(other entrance tile, distance)]}
+        self.cluster_edges = {}
+        # Cluster -> (bitboard of its entrance tiles, {bit number: entrance tile})
+        self.entrances = {}
+        # Cluster -> bitboard of its open tiles (see _mask)
+        self.cluster_masks = {}
+        # (cluster width, cluster height) -> column masks shared by same-sized clusters
+        self.column_masks = {}
+        # Entrance tile -> set of entrance tiles across a border
+        self.links = {}
+        # Entrance tile -> [(neighbouring entrance tile, distance)], in-cluster and across borders
+        self.graph = {}
+
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cluster_paths = {}
+
+    # ----------------------
+    # Grid helpers
+    # ----------------------
+    def is_open(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and not self.wall_grid[y * self.width + x]
+
+    def cluster_of(self, x, y):
+        return x // self.cluster_size, y // self.cluster_size
+
+    def _cluster_bounds(self, cluster):
+        cx, cy = cluster
+        x0 = cx * self.cluster_size
+        y0 = cy * self.cluster_size
+        return x0, y0, min(x0 + self.cluster_size, self.width), min(y0 + self.cluster_size, self.height)
+
+    def _mask(self, cluster):
+        """
+        Open tiles of a cluster as a bitboard
+
+        Returns:
+            tuple: (open bits, cluster width, bits not in the first column,
+            bits not in the last column, x0, y0); tile (x, y) is bit
+            (y - y0) * cluster width + (x - x0)
+        """
+        mask = self.cluster_masks.get(cluster)
+        if mask is not None:
+            return mask
+
+        x0, y0, x1, y1 = self._cluster_bounds(cluster)
+        w = x1 - x0
+        width = self.width
+        grid = self.wall_grid
+        flags = b"".join(grid[y * width + x0:y * width + x1] for y in range(y0, y1))
+        # Reversed so the cluster's first tile is the lowest bit
+        open_bits = int(flags.translate(OPEN_DIGITS)[::-1], 2)
+
+        columns = self.column_masks.get((w, y1 - y0))
+        if columns is None:
+            full = (1 << (w * (y1 - y0))) - 1
+            first = sum(1 << (row * w) for row in range(y1 - y0))
+            columns = self.column_masks[(w, y1 - y0)] = (full ^ first, full ^ (first << (w - 1)))
+
+        mask = self.cluster_masks[cluster] = (open_bits, w) + columns + (x0, y0)
+        return mask
+
+    def _bit(self, mask, index):
+        x0, y0 = mask[4], mask[5]
+        return 1 << ((index // self.width - y0) * mask[1] + index % self.width - x0)
+
+    def _index(self, mask, bit):
+        local = bit.bit_length() - 1
+        return (mask[5] + local // mask[1]) * self.width + mask[4] + local % mask[1]
+
+    def _flood(self, cluster, start, until=None):
+        """
+        Breadth-first search from a tile index, confined to its cluster
+
+        The whole frontier advances at once with shifts of the cluster's
+        bitboard, so a step costs a few integer operations however wide
+        the frontier is.
+
+        Args:
+            cluster: Cluster holding start
+            start: Tile index
+            until: Bitboard of tiles; the search stops once all reachable
+                ones are found (default: flood the whole cluster)
+
+        Returns:
+            list of bitboards, the tiles at each distance from start
+        """
+        mask = self._mask(cluster)
+        free, w, not_first, not_last = mask[:4]
+        frontier = self._bit(mask, start)
+        free &= ~frontier
+        if until is None:
+            until = free
+        layers = [frontier]
+        while until & free:
+            frontier = (((frontier << 1) & not_first) | ((frontier >> 1) & not_last)
+                        | (frontier << w) | (frontier >> w)) & free
+            if not frontier:
+                break
+            free ^= frontier
+            layers.append(frontier)
+        return layers
+
+    def _trace(self, cluster, layers, goal):
+        """Tile indices of a shortest path from the flood's start to goal (in its last layer)"""
+        mask = self.cluster_masks[cluster]
+        w, not_first, not_last = mask[1], mask[2], mask[3]
+        bit = self._bit(mask, goal)
+        path = []
+        for layer in reversed(layers[:-1]):
+            path.append(self._index(mask, bit))
+            # Step back to any neighbour one tile closer to the start
+            step = (((bit << 1) & not_first) | ((bit >> 1) & not_last) | (bit << w) | (bit >> w)) & layer
+            bit = step & -step
+        path.reverse()
+        return path
+
+    def _reach(self, cluster, layers, targets=None):
+        """Entrance tiles of a cluster (or just those in targets) found by a flood, with their distances"""
+        entrances, nodes = self.entrances[cluster]
+        remaining = entrances if targets is None else targets
+        found = []
+        for distance, layer in enumerate(layers):
+            hit = layer & remaining
+            if not hit:
+                continue
+            remaining ^= hit
+            while hit:
+                low = hit & -hit
+                found.append((nodes[low.bit_length() - 1], distance))
+                hit ^= low
+            if not remaining:
+                break
+        return found
+
+    # ----------------------
+    # Abstract graph
+    # ----------------------
+    def build(self):
+        """Precompute the entrances and in-cluster distances of every cluster"""
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                self._edges((cx, cy))
+
+    def _border(self, key):
+        """Entrances on the border ("h": with the cluster to the right, "v": below)"""
+        if key in self.borders:
+            return self.borders[key]
+
+        direction, cx, cy = key
+        x0, y0, x1, y1 = self._cluster_bounds((cx, cy))
+        width = self.width
+        if direction == "h":
+            if x1 >= width:
+                pairs = []
+            else:
+                pairs = [((x1 - 1, y), (x1, y)) for y in range(y0, y1)]
+        else:
+            if y1 >= self.height:
+                pairs = []
+            else:
+                pairs = [((x, y1 - 1), (x, y1)) for x in range(x0, x1)]
+
+        transitions = []
+        run = []
+        # A closing sentinel flushes the last run
+        for a, b in pairs + [(None, None)]:
+            if a is not None and self.is_open(*a) and self.is_open(*b):
+                run.append((a[1] * width + a[0], b[1] * width + b[0]))
+                continue
+            if run:
+                if len(run) < ENTRANCE_SPLIT:
+                    transitions.append(run[len(run) // 2])
+                else:
+                    transitions.append(run[0])
+                    transitions.append(run[-1])
+                run = []
+
+        for a, b in transitions:
+            self.links.setdefault(a, set()).add(b)
+            self.links.setdefault(b, set()).add(a)
+        self.borders[key] = transitions
+        return transitions
+
+    def _cluster_border_keys(self, cluster):
+        cx, cy = cluster
+        keys = [("h", cx, cy), ("v", cx, cy)]
+        if cx > 0:
+            keys.append(("h", cx - 1, cy))
+        if cy > 0:
+            keys.append(("v", cx, cy - 1))
+        return keys
+
+    def _edges(self, cluster):
+        """Entrance tiles of a cluster with the in-cluster distances between them (built on first use)"""
+        if cluster in self.cluster_edges:
+            return self.cluster_edges[cluster]
+
+        nodes = set()
+        for key in self._cluster_border_keys(cluster):
+            for a, b in self._border(key):
+                for node in (a, b):
+                    if self.cluster_of(node % self.width, node // self.width) == cluster:
+                        nodes.add(node)
+
+        mask = self._mask(cluster)
+        entrances = 0
+        bits = {}
+        for node in nodes:
+            bit = self._bit(mask, node)
+            entrances |= bit
+            bits[bit.bit_length() - 1] = node
+        self.entrances[cluster] = (entrances, bits)
+
+        edges = {node: [] for node in nodes}
+        # Distances are symmetric, so each search only looks for the entrances after it
+        remaining = entrances
+        for node in nodes:
+            remaining ^= self._bit(mask, node)
+            if not remaining:
+                break
+            for other, distance in self._reach(cluster, self._flood(cluster, node, remaining), remaining):
+                edges[node].append((other, distance))
+                edges[other].append((node, distance))
+        for node, node_edges in edges.items():
+            # Every link of the node comes from this cluster's borders, all built above
+            self.graph[node] = node_edges + [(other, 1) for other in self.links.get(node, ())]
+        self.cluster_edges[cluster] = edges
+        return edges
+
+    # ----------------------
+    # Queries
+    # ----------------------
+    def find_path(self, start, goal):
+        """
+        Find a path between two tiles
+
+        Args:
+            start: (x, y) tile
+            goal: (x, y) tile
+
+        Returns:
+            list of (x, y) tiles from the one after start up to goal, or
+            None if goal can't be reached
+        """
+        if start == goal:
+            return []
+        if not self.is_open(*start) or not self.is_open(*goal):
+            return None
+
+        key = (start, goal)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return list(self.cache[key][0])
+
+        path = self._search(start, goal)
+        if path is not None:
+            self._remember(key, path)
+            path = list(path)
+        return path
+
+    def _search(self, start, goal):
+        width = self.width
+        start_index = start[1] * width + start[0]
+        goal_index = goal[1] * width + goal[0]
+        start_cluster = self.cluster_of(*start)
+        goal_cluster = self.cluster_of(*goal)
+        self._edges(start_cluster)
+        self._edges(goal_cluster)
+
+        if start_cluster == goal_cluster:
+            # Same cluster: a local search is usually enough
+            goal_bit = self._bit(self.cluster_masks[goal_cluster], goal_index)
+            start_layers = self._flood(start_cluster, start_index, goal_bit)
+            if start_layers[-1] & goal_bit:
+                return self._to_tiles(self._trace(start_cluster, start_layers, goal_index))
+            # Otherwise the search above already covered the whole reachable area
+        else:
+            start_layers = self._flood(start_cluster, start_index, self.entrances[start_cluster][0])
+
+        # Connect start and goal to their clusters' entrances
+        goal_layers = self._flood(goal_cluster, goal_index, self.entrances[goal_cluster][0])
+        start_edges = self._reach(start_cluster, start_layers)
+        goal_edges = dict(self._reach(goal_cluster, goal_layers))
+
+        abstract = self._abstract_search(start_index, goal_index, start_edges, goal_edges)
+        if abstract is None:
+            return None
+        return self._refine([start_index] + abstract + [goal_index])
+
+    def _abstract_search(self, start_index, goal_index, start_edges, goal_edges):
+        """A* over entrance tiles; returns the entrance tiles between start and goal"""
+        width = self.width
+        goal_x, goal_y = goal_index % width, goal_index // width
+        graph = self.graph
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        best = {START: 0}
+        parents = {START: None}
+        open_heap = [(0, 0, START)]
+        while open_heap:
+            _, cost, node = heappop(open_heap)
+            if node == GOAL:
+                path = []
+                node = parents[GOAL]
+                while node != START:
+                    path.append(node)
+                    node = parents[node]
+                path.reverse()
+                return path
+            if cost > best[node]:
+                continue
+
+            if node == START:
+                neighbours = start_edges
+            else:
+                neighbours = graph.get(node)
+                if neighbours is None:
+                    self._edges(self.cluster_of(node % width, node // width))
+                    neighbours = graph[node]
+                if node in goal_edges:
+                    neighbours = neighbours + [(GOAL, goal_edges[node])]
+
+            for neighbour, step in neighbours:
+                new_cost = cost + step
+                if new_cost < best.get(neighbour, new_cost + 1):
+                    best[neighbour] = new_cost
+                    parents[neighbour] = node
+                    if neighbour == GOAL:
+                        heappush(open_heap, (new_cost, new_cost, GOAL))
+                    else:
+                        # Manhattan distance to the goal
+                        estimate = abs(neighbour % width - goal_x) + abs(neighbour // width - goal_y)
+                        heappush(open_heap, (new_cost + estimate, new_cost, neighbour))
+        return None
+
+    def _refine(self, waypoints):
+        """Expand abstract hops into tiles with cluster-local searches"""
+        width = self.width
+        tiles = []
+        for a, b in zip(waypoints, waypoints[1:]):
+            if a == b:
+                continue
+            ax, ay = a % width, a // width
+            bx, by = b % width, b // width
+            if abs(ax - bx) + abs(ay - by) == 1:
+                tiles.append(b)
+                continue
+            cluster = self.cluster_of(ax, ay)
+            goal_bit = self._bit(self._mask(cluster), b)
+            layers = self._flood(cluster, a, goal_bit)
+            if not layers[-1] & goal_bit:
+                return None
+            tiles.extend(self._trace(cluster, layers, b))
+        return self._to_tiles(tiles)
+
+    def _to_tiles(self, indices):
+        width = self.width
+        return [(index % width, index // width) for index in indices]
+
+    # ----------------------
+    # Cache and updates
+    # ----------------------
+    def _remember(self, key, path):
+        clusters = {self.cluster_of(*key[0])}
+        clusters.update(self.cluster_of(x, y) for x, y in path)
+        self.cache[key] = (tuple(path), clusters)
+        for cluster in clusters:
+            self.cluster_paths.setdefault(cluster, set()).add(key)
+
+        while len(self.cache) > self.cache_size:
+            old_key, (_, old_clusters) = self.cache.popitem(last=False)
+            for cluster in old_clusters:
+                self.cluster_paths[cluster].discard(old_key)
+
+    def _forget_cluster(self, cluster):
+        for key in self.cluster_paths.pop(cluster, ()):
+            entry = self.cache.pop(key, None)
+            if entry:
+                for other in entry[1]:
+                    if other != cluster:
+                        self.cluster_paths[other].discard(key)
+
+    def update_tile(self, x, y, is_wall):
+        """
+        Change a tile and rebuild only the abstract graph around its cluster
+
+        Args:
+            x: Tile x
+            y: Tile y
+            is_wall: New wall state
+        """
+        self.wall_grid[y * self.width + x] = 1 if is_wall else 0
+        cluster = self.cluster_of(x, y)
+        self.cluster_masks.pop(cluster, None)
+
+        for key in self._cluster_border_keys(cluster):
+            for a, b in self.borders.pop(key, ()):
+                self.links.get(a, set()).discard(b)
+                self.links.get(b, set()).discard(a)
+
+        cx, cy = cluster
+        neighbours = [(nx, ny) for nx, ny in (cluster, (cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1))
+                      if 0 <= nx < self.clusters_x and 0 <= ny < self.clusters_y]
+        for neighbour in neighbours:
+            for node in self.cluster_edges.pop(neighbour, ()):
+                self.graph.pop(node, None)
+            self._forget_cluster(neighbour)
+        for neighbour in neighbours:
+            self._edges(neighbour)
+
+    def clear_cache(self):
+        self.cache.clear()
+        self.cluster_paths.clear()
@@ -1,8 +1,36 @@
+import time
 import pygame
 from constants import PLAYER_SIZE, PLAYER_SPEED, PLAYER_COLOR, TILE_SIZE
+from image_cache import load_image, render_sprite
+
+# Integer codes used when packing player state (see get_state/set_state)
+DIRECTIONS = ("up", "down", "left", "right")
+
+# Movement keys, for queueing presses from KEYDOWN events
+KEY_DIRECTIONS = {
+    pygame.K_LEFT: "left", pygame.K_a: "left",
+    pygame.K_RIGHT: "right", pygame.K_d: "right",
+    pygame.K_UP: "up", pygame.K_w: "up",
+    pygame.K_DOWN: "down", pygame.K_s: "down",
+}
+
+
+def _paint_player(surface, color, radius, size):
+    pygame.draw.circle(surface, color, (radius, radius), radius)
+    eye_offset = size // 6
+    eye_size = size // 10
+    pygame.draw.circle(surface, (0, 0, 0), (radius - eye_offset, radius - eye_offset), eye_size)
+    pygame.draw.circle(surface, (0, 0, 0), (radius + eye_offset, radius - eye_offset), eye_size)
+
 
 class Player:
 
+    __slots__ = (
+        "grid_x", "grid_y", "x", "y", "target_x", "target_y", "prev_x", "prev_y",
+        "size", "speed", "color", "is_moving", "move_direction", "image", "use_image", "sprite",
+        "queued_direction", "queued_at", "input_latency",
+    )
+
     def __init__(self, x, y):
         self.grid_x = x
         self.grid_y = y
@@ -10,44 +38,85 @@ class Player:
         self.y = y * TILE_SIZE + TILE_SIZE // 2
         self.target_x = self.x
         self.target_y = self.y
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.size = PLAYER_SIZE
         self.speed = PLAYER_SPEED
         self.color = PLAYER_COLOR
         self.is_moving = False
         self.move_direction = None
-
-        try:
-            self.image = pygame.image.load("assets/images/player.png")
-            self.image = pygame.transform.scale(self.image, (self.size, self.size))
-            self.use_image = True
-        except:
-            self.image = None
-            self.use_image = False
+        # Last key press not yet turned into a move, and when it was read
+        self.queued_direction = None
+        self.queued_at = 0.0
+        # Milliseconds from a queued press to the start of its move, until collected
+        self.input_latency = None
+
+        self.image = load_image("assets/images/player.png", self.size)
+        self.use_image = self.image is not None
+        self.sprite = self._build_sprite()
+
+    def _build_sprite(self):
+        """The image, or the drawn circle pre-rendered once (drawn centred on the position)"""
+        if self.use_image and self.image:
+            return self.image
+        radius = self.size // 2
+        side = radius * 2 + 1
+        return render_sprite(("player", self.color, self.size), (side, side),
+                             _paint_player, self.color, radius, self.size)
+
+    def queue_direction(self, direction, pressed_at=None):
+        """
+        Buffer a key press so it isn't lost while moving between tiles
+
+        The press starts the next move, on the tick the current one ends.
+        A newer press replaces an older one still waiting.
+
+        Args:
+            direction: "up", "down", "left" or "right"
+            pressed_at: time.perf_counter() when the press was read
+        """
+        self.queued_direction = direction
+        self.queued_at = time.perf_counter() if pressed_at is None else pressed_at
 
     def handle_input(self, keys):
-        """Detect movement key presses"""
-        if not self.is_moving:
-            if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-                self.move_direction = "left"
-            elif keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-                self.move_direction = "right"
-            elif keys[pygame.K_UP] or keys[pygame.K_w]:
-                self.move_direction = "up"
-            elif keys[pygame.K_DOWN] or keys[pygame.K_s]:
-                self.move_direction = "down"
+        """Detect held movement keys, which keep the player moving"""
+        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+            self.move_direction = "left"
+        elif keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            self.move_direction = "right"
+        elif keys[pygame.K_UP] or keys[pygame.K_w]:
+            self.move_direction = "up"
+        elif keys[pygame.K_DOWN] or keys[pygame.K_s]:
+            self.move_direction = "down"
+        else:
+            self.move_direction = None
 
     def update(self, walls):
-        was_moving = self.is_moving
         """Move one tile per key press"""
-        if not self.is_moving and self.move_direction:
+        # Position at the start of the tick, for render interpolation
+        self.prev_x = self.x
+        self.prev_y = self.y
+
+        moved = False
+        if self.is_moving:
+            self._move_towards_target()
+            moved = True
+            if self._reached_target():
+                self.is_moving = False
+
+        # The next move starts on the tick the last one ends; a queued
+        # press goes before a held key
+        queued = self.queued_direction
+        direction = queued or self.move_direction
+        if not self.is_moving and direction:
             dx, dy = 0, 0
-            if self.move_direction == "left":
+            if direction == "left":
                 dx = -1
-            elif self.move_direction == "right":
+            elif direction == "right":
                 dx = 1
-            elif self.move_direction == "up":
+            elif direction == "up":
                 dy = -1
-            elif self.move_direction == "down":
+            elif direction == "down":
                 dy = 1
 
             new_x = self.grid_x + dx
@@ -72,12 +141,14 @@ class Player:
 
                 # audio.sounds["move"].play(loops=-1)
 
-            self.move_direction = None
+                # Starting from rest, the first step is taken this tick
+                if not moved:
+                    self._move_towards_target()
+                if queued:
+                    self.input_latency = (time.perf_counter() - self.queued_at) * 1000
 
-        elif self.is_moving:
-            self._move_towards_target()
-            if self._reached_target():
-                self.is_moving = False
+            self.queued_direction = None
+            self.move_direction = None
 
     def _move_towards_target(self):
         """Smooth movement toward next tile"""
@@ -103,15 +174,43 @@ class Player:
     def get_position(self):
         return (self.x, self.y)
 
-    def draw(self, screen):
-        if self.use_image and self.image:
-            screen.blit(self.image, (self.x - self.size // 2, self.y - self.size // 2))
-        else:
-            pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.size // 2)
-            eye_offset = self.size // 6
-            eye_size = self.size // 10
-            pygame.draw.circle(screen, (0, 0, 0), (int(self.x - eye_offset), int(self.y - eye_offset)), eye_size)
-            pygame.draw.circle(screen, (0, 0, 0), (int(self.x + eye_offset), int(self.y - eye_offset)), eye_size)
+    def get_draw_position(self, alpha=1.0):
+        """Position interpolated between the last two ticks (alpha 0-1)"""
+        return (
+            self.prev_x + (self.x - self.prev_x) * alpha,
+            self.prev_y + (self.y - self.prev_y) * alpha,
+        )
+
+    def get_sprite(self, alpha=1.0):
+        """(surface, top-left) pair for batched blitting"""
+        x, y = self.get_draw_position(alpha)
+        half = self.sprite.get_width() // 2
+        return self.sprite, (int(x) - half, int(y) - half)
+
+    def draw(self, screen, alpha=1.0):
+        screen.blit(*self.get_sprite(alpha))
+
+    def get_state(self):
+        """Pack the mutable player state into a tuple of ints (positions in quarter pixels)"""
+        return (
+            self.grid_x, self.grid_y,
+            round(self.x * 4), round(self.y * 4),
+            round(self.target_x * 4), round(self.target_y * 4),
+            int(self.is_moving),
+            DIRECTIONS.index(self.move_direction) if self.move_direction else -1,
+        )
+
+    def set_state(self, state):
+        """Restore state packed by get_state()"""
+        self.grid_x, self.grid_y, x, y, target_x, target_y, is_moving, direction = (int(v) for v in state)
+        self.x = self.prev_x = x / 4
+        self.y = self.prev_y = y / 4
+        self.target_x = target_x / 4
+        self.target_y = target_y / 4
+        self.is_moving = bool(is_moving)
+        self.move_direction = DIRECTIONS[direction] if direction >= 0 else None
+        self.queued_direction = None
+        self.input_latency = None
 
     def reset(self, x, y):
         self.grid_x = x
@@ -120,5 +219,9 @@ class Player:
         self.y = y * TILE_SIZE + TILE_SIZE // 2
         self.target_x = self.x
         self.target_y = self.y
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.is_moving = False
         self.move_direction = None
+        self.queued_direction = None
+        self.input_latency = None
@@ -0,0 +1,88 @@
+"""
+Render Quality - Picks a quality tier from measured frame times
+"""
+
+from collections import deque
+from constants import (
+    FPS, QUALITY_FLAT, QUALITY_FULL, QUALITY_ADAPTIVE, QUALITY_WINDOW_FRAMES,
+    QUALITY_DOWN_LOAD, QUALITY_UP_LOAD, QUALITY_UP_HOLD_FRAMES
+)
+
+QUALITY_NAMES = ("flat", "reduced", "full")
+
+
+class QualityController:
+    """Steps the render quality tier to keep frames inside the frame budget
+
+    main() reports how long each frame's work took (update, draw and flip,
+    without the frame cap's sleep). Once a full window of frames has been
+    seen since the last change, the average decides: above
+    QUALITY_DOWN_LOAD of the budget the tier drops by one, below
+    QUALITY_UP_LOAD it rises by one. After a drop, rising waits
+    QUALITY_UP_HOLD_FRAMES, doubled each time a rise has to be undone
+    straight away, so a tier that doesn't fit isn't retried forever.
+    Tiers only drop effects; every tier renders at SCREEN_WIDTH x SCREEN_HEIGHT.
+    """
+
+    def __init__(self, tier=QUALITY_FULL, budget=1 / FPS, adaptive=QUALITY_ADAPTIVE,
+                 window=QUALITY_WINDOW_FRAMES):
+        """
+        Args:
+            tier: Starting tier (QUALITY_FLAT to QUALITY_FULL)
+            budget: Seconds available per frame
+            adaptive: False keeps the starting tier
+            window: Frames averaged for each decision
+        """
+        self.tier = tier
+        self.budget = budget
+        self.adaptive = adaptive
+        self.frame_times = deque(maxlen=window)
+        self.total = 0.0
+        self.hold = 0
+        self.backoff = 1
+        self.just_raised = False
+
+    @property
+    def name(self):
+        return QUALITY_NAMES[self.tier]
+
+    @property
+    def average(self):
+        """Average frame time over the current window, in seconds"""
+        return self.total / len(self.frame_times) if self.frame_times else 0.0
+
+    def record(self, frame_time):
+        """
+        Add one frame's work time
+
+        Args:
+            frame_time: Seconds the frame took, excluding the frame cap's sleep
+
+        Returns:
+            bool: True if the tier changed
+        """
+        times = self.frame_times
+        if len(times) == times.maxlen:
+            self.total -= times[0]
+        times.append(frame_time)
+        self.total += frame_time
+        if self.hold:
+            self.hold -= 1
+
+        if not self.adaptive or len(times) < times.maxlen:
+            return False
+        load = self.total / (len(times) * self.budget)
+        raised, self.just_raised = self.just_raised, False
+        if load > QUALITY_DOWN_LOAD and self.tier > QUALITY_FLAT:
+            self.backoff = min(self.backoff * 2, 64) if raised else 1
+            self.tier -= 1
+            self.hold = QUALITY_UP_HOLD_FRAMES * self.backoff
+        elif load < QUALITY_UP_LOAD and self.tier < QUALITY_FULL and not self.hold:
+            self.tier += 1
+            self.just_raised = True
+        else:
+            return False
+        # Measure the new tier from scratch
+        times.clear()
+        self.total = 0.0
+        return True
@@ -0,0 +1,210 @@
+"""
+Rewind - Bounded history of game state for stepping back in time
+"""
+
+import zlib
+from collections import deque
+import numpy as np
+from constants import SIMULATION_HZ, REWIND_SECONDS, REWIND_KEYFRAME_INTERVAL
+
+PLAYER_FIELDS = 8
+ENEMY_FIELDS = 15
+ENEMY_MOVING_FIELD = 6
+
+
+class RewindBuffer:
+    """Ring buffer of per-tick Maze states, delta-encoded between periodic keyframes
+
+    Every tick the player, enemy and collectible state is packed into one
+    int32 vector. Every keyframe_interval ticks the vector is kept whole; in
+    between only the zlib-compressed int16 difference from the previous tick
+    is kept, which is mostly zeros. Restoring a tick decodes forward from its
+    keyframe, and only enemies whose state differs from the present one are
+    written back. Enemy visit memory only ever grows by one visit when an enemy
+    arrives on a tile, so instead of copying it each frame stores that tick's
+    arrivals and rewinding undoes them.
+    """
+
+    def __init__(self, seconds=REWIND_SECONDS, keyframe_interval=REWIND_KEYFRAME_INTERVAL):
+        """
+        Args:
+            seconds: How much history to keep
+            keyframe_interval: Ticks between full keyframes
+        """
+        self.keyframe_interval = keyframe_interval
+        self.max_frames = max(1, int(seconds * SIMULATION_HZ))
+        # Frames are (keyframe vector or None, delta bytes or None, arrivals,
+        # timer, score, last_collected)
+        self.frames = deque()
+        self.oldest_vector = None
+        self.last_vector = None
+        self.ticks_since_keyframe = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def clear(self):
+        """Forget all history (call when the level changes or restarts)"""
+        self.frames.clear()
+        self.oldest_vector = None
+        self.last_vector = None
+        self.ticks_since_keyframe = 0
+
+    def _pack(self, maze):
+        values = []
+        if maze.player:
+            values.extend(maze.player.get_state())
+        for enemy in maze.enemies:
+            values.extend(enemy.get_state())
+        values.extend(int(c.collected) for c in maze.collectibles)
+        return np.array(values, dtype=np.int32)
+
+    def _unpack(self, maze, vector, current=None):
+        """
+        Set the maze to a packed vector
+
+        Args:
+            current: Packed vector of the maze's present state, if known;
+                enemies whose state matches it are left alone
+        """
+        offset = 0
+        if maze.player:
+            maze.player.set_state(vector[:PLAYER_FIELDS])
+            offset = PLAYER_FIELDS
+
+        enemies = maze.enemies
+        enemy_block = self._enemy_block(maze, vector)
+        if current is not None and current.shape == vector.shape:
+            changed = np.flatnonzero((enemy_block != self._enemy_block(maze, current)).any(axis=1))
+        else:
+            changed = np.arange(len(enemies))
+        for index, state in zip(changed, enemy_block[changed].tolist()):
+            enemies[index].set_state(state)
+        offset += len(enemies) * ENEMY_FIELDS
+
+        for collectible, collected in zip(maze.collectibles, vector[offset:].tolist()):
+            collectible.collected = bool(collected)
+        maze.exit_unlocked = all(c.collected for c in maze.collectibles)
+
+    def _enemy_block(self, maze, vector):
+        offset = PLAYER_FIELDS if maze.player else 0
+        count = len(maze.enemies)
+        return vector[offset:offset + count * ENEMY_FIELDS].reshape(count, ENEMY_FIELDS)
+
+    def _apply_delta(self, vector, delta):
+        return vector + np.frombuffer(zlib.decompress(delta), dtype=np.int16)
+
+    def record(self, maze, timer, score, last_collected):
+        """
+        Record the state at the end of a tick
+
+        Args:
+            maze: Maze to record
+            timer: Level timer value
+            score: Current score
+            last_collected: GameManager's collected counter
+        """
+        vector = self._pack(maze)
+        previous = self.last_vector
+        if previous is not None and previous.shape != vector.shape:
+            self.clear()
+            previous = None
+
+        # Enemies that stopped moving this tick have just arrived on a tile
+        arrivals = None
+        if previous is not None and maze.enemies:
+            before = self._enemy_block(maze, previous)[:, ENEMY_MOVING_FIELD]
+            now = self._enemy_block(maze, vector)
+            arrived = np.flatnonzero((before == 1) & (now[:, ENEMY_MOVING_FIELD] == 0))
+            if arrived.size:
+                # (enemy index, grid x, grid y) of every visit added this tick
+                triples = np.column_stack((arrived, now[arrived, 0], now[arrived, 1]))
+                arrivals = triples.astype(np.int32).tobytes()
+
+        keyframe, delta = vector, None
+        if previous is not None and self.ticks_since_keyframe < self.keyframe_interval:
+            diff = vector - previous
+            if not diff.size or np.abs(diff).max() <= 32767:
+                keyframe, delta = None, zlib.compress(diff.astype(np.int16).tobytes(), 6)
+
+        if keyframe is not None:
+            self.ticks_since_keyframe = 0
+        self.ticks_since_keyframe += 1
+        self.last_vector = vector
+
+        self.frames.append((keyframe, delta, arrivals, timer, score, last_collected))
+        if self.oldest_vector is None:
+            self.oldest_vector = vector
+        if len(self.frames) > self.max_frames:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        """Drop the oldest frame, turning its successor into a keyframe if needed"""
+        self.frames.popleft()
+        keyframe, delta, arrivals, timer, score, last_collected = self.frames[0]
+        if keyframe is None:
+            keyframe = self._apply_delta(self.oldest_vector, delta)
+            self.frames[0] = (keyframe, None, arrivals, timer, score, last_collected)
+        self.oldest_vector = keyframe
+
+    def _decode(self, index):
+        """Rebuild the full vector of the frame at the given position"""
+        start = index
+        while self.frames[start][0] is None:
+            start -= 1
+        vector = self.frames[start][0]
+        for position in range(start + 1, index + 1):
+            vector = self._apply_delta(vector, self.frames[position][1])
+        return vector, index - start + 1
+
+    def rewind(self, maze, ticks):
+        """
+        Restore the state recorded the given number of ticks ago
+
+        Newer history is discarded, so recording simply continues from the
+        restored tick.
+
+        Args:
+            maze: Maze to restore into (the one that was recorded)
+            ticks: How many ticks to go back, clamped to the oldest frame
+
+        Returns:
+            tuple: (timer, score, last_collected) of the restored tick, or
+            None if there is no history
+        """
+        if not self.frames:
+            return None
+        ticks = max(0, min(ticks, len(self.frames) - 1))
+
+        # Undo the visits added after the restored tick
+        dropped = []
+        for _ in range(ticks):
+            arrivals = self.frames.pop()[2]
+            if arrivals is not None:
+                dropped.append(np.frombuffer(arrivals, dtype=np.int32))
+        if dropped:
+            self._undo_visits(maze.visits, np.concatenate(dropped).reshape(-1, 3))
+
+        vector, self.ticks_since_keyframe = self._decode(len(self.frames) - 1)
+        # last_vector is the state the maze is in now, as of the last record()
+        self._unpack(maze, vector, self.last_vector)
+        self.last_vector = vector
+
+        _, _, _, timer, score, last_collected = self.frames[-1]
+        return timer, score, last_collected
+
+    def _undo_visits(self, visits, arrivals):
+        """Remove (enemy, x, y) arrivals from the level's VisitGrid"""
+        tiles = arrivals[:, 2].astype(np.int64) * visits.width + arrivals[:, 1]
+        tiles, amounts = np.unique(tiles, return_counts=True)
+        counts = np.frombuffer(visits.counts, dtype=np.uint16)
+        counts[tiles] = np.maximum(counts[tiles].astype(np.int64) - amounts, 0)
+
+    def memory_usage(self):
+        """Approximate bytes held by the history"""
+        total = 0
+        for keyframe, delta, arrivals, _, _, _ in self.frames:
+            if keyframe is not None:
+                total += keyframe.nbytes
+            total += len(delta or b"") + len(arrivals or b"")
+        return total
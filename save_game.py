@@ -0,0 +1,244 @@
+"""
+Save Game - Compact binary quick-save format and background writer
+"""
+
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+from array import array
+
+SAVE_MAGIC = b"ETMZ"
+SAVE_VERSION = 2
+
+# magic, version, level index, timer, score, last collected,
+# player field count, enemy count, enemy field count, collectible count,
+# visit grid width, visit grid height
+HEADER = struct.Struct("<4sHHdiiIIIIII")
+CHECKSUM = struct.Struct("<I")
+
+
+class SaveError(Exception):
+    """Raised when a save file is missing, corrupt or from another version"""
+
+
+def _to_bytes(values):
+    # Save files are always little-endian
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode, data, offset, count):
+    values = array(typecode)
+    size = values.itemsize * count
+    if offset + size > len(data):
+        raise SaveError("Save file is truncated")
+    values.frombytes(data[offset:offset + size])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, offset + size
+
+
+def serialize(level_index, timer, score, last_collected, maze):
+    """
+    Pack a game session into bytes
+
+    Args:
+        level_index: Index into LEVELS
+        timer: Level timer value
+        score: Current score
+        last_collected: GameManager's collected counter
+        maze: Maze whose entity state is saved
+
+    Returns:
+        bytes: Save file contents
+    """
+    player_state = maze.player.get_state() if maze.player else ()
+    enemy_states = array("i")
+    enemy_fields = 0
+    for enemy in maze.enemies:
+        state = enemy.get_state()
+        enemy_fields = len(state)
+        enemy_states.extend(state)
+
+    collected = array("B", (c.collected for c in maze.collectibles))
+
+    # Visit memory: the level's whole uint16 visit grid
+    visits = array("H", maze.visits.counts)
+
+    header = HEADER.pack(
+        SAVE_MAGIC, SAVE_VERSION, level_index, timer, score, last_collected,
+        len(player_state), len(maze.enemies), enemy_fields, len(maze.collectibles),
+        maze.visits.width, maze.visits.height
+    )
+    body = b"".join((
+        header,
+        _to_bytes(array("i", player_state)),
+        _to_bytes(enemy_states),
+        collected.tobytes(),
+        _to_bytes(visits),
+    ))
+    return body + CHECKSUM.pack(zlib.crc32(body))
+
+
+def deserialize(data):
+    """
+    Unpack bytes written by serialize()
+
+    Returns:
+        dict with level_index, timer, score, last_collected, player,
+        enemies (list of state lists), collected (list of bools),
+        visits (little-endian uint16 grid bytes) and visits_size
+
+    Raises:
+        SaveError: If the data is not a valid save of this version
+    """
+    if len(data) < HEADER.size + CHECKSUM.size:
+        raise SaveError("Save file is truncated")
+    body, (checksum,) = data[:-CHECKSUM.size], CHECKSUM.unpack(data[-CHECKSUM.size:])
+    if zlib.crc32(body) != checksum:
+        raise SaveError("Save file is corrupt")
+
+    (magic, version, level_index, timer, score, last_collected,
+     player_fields, enemy_count, enemy_fields, collectible_count,
+     visits_width, visits_height) = HEADER.unpack_from(body)
+    if magic != SAVE_MAGIC:
+        raise SaveError("Not a save file")
+    if version != SAVE_VERSION:
+        raise SaveError(f"Unsupported save version {version}")
+
+    offset = HEADER.size
+    player, offset = _from_bytes("i", body, offset, player_fields)
+    enemy_values, offset = _from_bytes("i", body, offset, enemy_count * enemy_fields)
+    collected, offset = _from_bytes("B", body, offset, collectible_count)
+
+    visits, offset = _from_bytes("H", body, offset, visits_width * visits_height)
+
+    enemies = [
+        enemy_values[i:i + enemy_fields].tolist()
+        for i in range(0, len(enemy_values), enemy_fields)
+    ] if enemy_fields else [[] for _ in range(enemy_count)]
+
+    return {
+        "level_index": level_index,
+        "timer": timer,
+        "score": score,
+        "last_collected": last_collected,
+        "player": player.tolist(),
+        "enemies": enemies,
+        "collected": [bool(c) for c in collected],
+        "visits": visits.tobytes(),
+        "visits_size": (visits_width, visits_height),
+    }
+
+
+def apply_to_maze(save, maze):
+    """
+    Restore entity state from deserialize() output into a freshly loaded Maze
+
+    The maze may be left half restored on error, so pass one that can be
+    thrown away.
+
+    Raises:
+        SaveError: If the save doesn't match the maze's entities
+    """
+    if len(save["enemies"]) != len(maze.enemies) or len(save["collected"]) != len(maze.collectibles) \
+            or save["visits_size"] != (maze.visits.width, maze.visits.height):
+        raise SaveError("Save file doesn't match this level")
+
+    try:
+        if maze.player and save["player"]:
+            maze.player.set_state(save["player"])
+        for enemy, state in zip(maze.enemies, save["enemies"]):
+            enemy.set_state(state)
+    except (ValueError, IndexError) as e:
+        # Right counts but entity fields from another layout of the state
+        raise SaveError("Save file doesn't match this level") from e
+    maze.visits.load_bytes(save["visits"])
+
+    for collectible, collected in zip(maze.collectibles, save["collected"]):
+        collectible.collected = collected
+    maze.exit_unlocked = all(save["collected"])
+
+
+def read_save(path):
+    """
+    Read and decode a save file
+
+    Raises:
+        SaveError: If the file can't be read or decoded
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise SaveError(f"Can't read save file: {e}") from e
+    return deserialize(data)
+
+
+class SaveWriter:
+    """Writes save files atomically on a background thread"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.last_error = None
+        # (path, OSError) of each failed write, until take_failures() reports it
+        self.failures = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, path, data):
+        """
+        Queue data to be written to path; returns immediately
+
+        Args:
+            path: File to write
+            data: bytes, or a callable returning them; a callable runs on
+                the writer thread, so costly encoding stays off the caller's
+        """
+        self.queue.put((path, data))
+
+    def flush(self):
+        """Block until every queued save has been written"""
+        self.queue.join()
+
+    def take_failures(self):
+        """
+        Failed writes since the last call
+
+        Returns:
+            list of (path, OSError)
+        """
+        failures = []
+        while not self.failures.empty():
+            failures.append(self.failures.get())
+        return failures
+
+    def _run(self):
+        while True:
+            path, data = self.queue.get()
+            try:
+                if callable(data):
+                    data = data()
+                self._write_atomic(path, data)
+                self.last_error = None
+            except OSError as e:
+                self.last_error = e
+                self.failures.put((path, e))
+            finally:
+                self.queue.task_done()
+
+    def _write_atomic(self, path, data):
+        # Write next to the target then rename over it, so a crash mid-write
+        # never leaves a half-written save behind
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
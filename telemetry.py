@@ -0,0 +1,242 @@
+"""
+Telemetry - Gameplay recording into ring buffers, aggregated into per-level heatmaps
+"""
+
+import io
+import os
+import time
+from functools import partial
+import numpy as np
+from constants import (
+    TELEMETRY_DIR, TELEMETRY_TRACK_SIZE, TELEMETRY_EVENT_SIZE, TELEMETRY_FLUSH_RUNS, TELEMETRY_MAX_EVENTS
+)
+from enemy import ENEMY_STATES
+
+# Event kinds (column 2 of an event record)
+EVENT_ENEMY_STATE = 0
+EVENT_PICKUP = 1
+EVENT_DEATH = 2
+
+# Run outcomes and death causes, stored as indices
+OUTCOMES = ("win", "lose", "abandon")
+DEATH_CAUSES = ("time", "caught")
+
+# Heatmaps kept per level, each a (height, width) uint32 array
+HEATMAPS = ("player", "deaths", "catches", "pickups", "chase_starts", "enemy_visits")
+
+# Event record: run, tick, kind, tile x, tile y, a, b
+#   enemy state: a = enemy index, b = index into ENEMY_STATES
+#   pickup:      a = collectible index
+#   death:       a = index into DEATH_CAUSES
+EVENT_FIELDS = 7
+
+# Run record: level index, outcome, ticks, time taken (ms), score, enemy count
+RUN_FIELDS = 6
+
+
+def _compress(arrays):
+    """The .npz file contents for a dict of arrays"""
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+class TelemetryRecorder:
+    """Per-tick gameplay recording with fixed memory
+
+    The player's tile each tick and discrete events go into preallocated
+    int32 ring buffers, so recording a tick is a couple of array writes.
+    Enemies report their own state changes through on_state_change while
+    a run is recorded, so ticks without any cost nothing per enemy.
+    Whenever a ring is about to wrap, and when a run ends, its records are
+    folded into the level's heatmaps with np.add.at. Every
+    TELEMETRY_FLUSH_RUNS runs (and on flush()) the heatmaps, run summaries
+    and events go to disk as one .npz, compressed and written by the save
+    writer's background thread. At most TELEMETRY_MAX_EVENTS raw events are
+    held for a file; later ones still count in the heatmaps.
+    """
+
+    def __init__(self, writer, directory=TELEMETRY_DIR,
+                 track_size=TELEMETRY_TRACK_SIZE, event_size=TELEMETRY_EVENT_SIZE):
+        """
+        Args:
+            writer: SaveWriter used to write the .npz files in the background
+            directory: Folder for the telemetry files
+            track_size: Player positions buffered before folding
+            event_size: Events buffered before folding
+        """
+        self.writer = writer
+        self.directory = directory
+        self.track = np.zeros((track_size, 2), dtype=np.int32)
+        self.track_count = 0
+        self.events = np.zeros((event_size, EVENT_FIELDS), dtype=np.int32)
+        self.event_count = 0
+
+        self.heatmaps = {}
+        self.runs = []
+        self.run_events = []
+        self.run_event_count = 0
+        self.events_dropped = 0
+        self.run_id = 0
+        self.flush_count = 0
+
+        self.level_index = None
+        self.maze = None
+        self.tick = 0
+
+    # ----------------------
+    # Recording
+    # ----------------------
+    def begin_run(self, level_index, maze):
+        """
+        Start recording a run; an unfinished previous run is ended as abandoned
+
+        Args:
+            level_index: Index into LEVELS
+            maze: The level's Maze
+        """
+        if self.maze is not None:
+            self.end_run("abandon")
+        self.level_index = level_index
+        self.maze = maze
+        self.tick = 0
+        self.track_count = 0
+        self.event_count = 0
+        for index, enemy in enumerate(maze.enemies):
+            enemy.on_state_change = partial(self._enemy_state_changed, index)
+        if level_index not in self.heatmaps:
+            self.heatmaps[level_index] = {
+                name: np.zeros((maze.height, maze.width), dtype=np.uint32) for name in HEATMAPS
+            }
+
+    def record_tick(self):
+        """Record the player's tile for this tick (call after the tick's update)"""
+        maze = self.maze
+        if maze is None:
+            return
+        if self.track_count == len(self.track):
+            self._fold_track()
+        if maze.player:
+            self.track[self.track_count] = (maze.player.grid_x, maze.player.grid_y)
+            self.track_count += 1
+        self.tick += 1
+
+    def _enemy_state_changed(self, index, enemy):
+        self._event(EVENT_ENEMY_STATE, enemy.grid_x, enemy.grid_y, index, ENEMY_STATES.index(enemy.state))
+
+    def record_pickup(self, collectible_index=-1):
+        if self.maze is not None and self.maze.player:
+            player = self.maze.player
+            self._event(EVENT_PICKUP, player.grid_x, player.grid_y, collectible_index)
+
+    def record_death(self, cause):
+        """
+        Args:
+            cause: "time" or "caught"
+        """
+        if self.maze is not None and self.maze.player:
+            player = self.maze.player
+            self._event(EVENT_DEATH, player.grid_x, player.grid_y, DEATH_CAUSES.index(cause))
+
+    def end_run(self, outcome, time_taken=0.0, score=0):
+        """
+        Finish the current run and fold it into the heatmaps
+
+        Args:
+            outcome: "win", "lose" or "abandon"
+            time_taken: Seconds played
+            score: Score at the end of the run
+        """
+        maze = self.maze
+        if maze is None:
+            return
+        self._fold_track()
+        self._fold_events()
+        for enemy in maze.enemies:
+            enemy.on_state_change = None
+
+        # Enemy patrol coverage comes straight from the level's visit memory
+        visits = np.frombuffer(maze.visits.counts, dtype=np.uint16).reshape(maze.height, maze.width)
+        self.heatmaps[self.level_index]["enemy_visits"] += visits
+
+        self.runs.append((self.level_index, OUTCOMES.index(outcome), self.tick,
+                          int(time_taken * 1000), score, len(maze.enemies)))
+        self.run_id += 1
+        self.maze = None
+
+        if len(self.runs) >= TELEMETRY_FLUSH_RUNS:
+            self.flush()
+
+    def _event(self, kind, x, y, a=0, b=0):
+        if self.event_count == len(self.events):
+            self._fold_events()
+        self.events[self.event_count] = (self.run_id, self.tick, kind, x, y, a, b)
+        self.event_count += 1
+
+    # ----------------------
+    # Aggregation
+    # ----------------------
+    def _fold_track(self):
+        if self.track_count:
+            track = self.track[:self.track_count]
+            np.add.at(self.heatmaps[self.level_index]["player"], (track[:, 1], track[:, 0]), 1)
+            self.track_count = 0
+
+    def _fold_events(self):
+        if not self.event_count:
+            return
+        events = self.events[:self.event_count].copy()
+        self.event_count = 0
+        heatmaps = self.heatmaps[self.level_index]
+        kinds = events[:, 2]
+
+        def add(name, mask):
+            selected = events[mask]
+            np.add.at(heatmaps[name], (selected[:, 4], selected[:, 3]), 1)
+
+        deaths = kinds == EVENT_DEATH
+        add("deaths", deaths)
+        add("catches", deaths & (events[:, 5] == DEATH_CAUSES.index("caught")))
+        add("pickups", kinds == EVENT_PICKUP)
+        add("chase_starts", (kinds == EVENT_ENEMY_STATE) & (events[:, 6] == ENEMY_STATES.index("chase")))
+
+        room = TELEMETRY_MAX_EVENTS - self.run_event_count
+        if len(events) > room:
+            self.events_dropped += len(events) - room
+            events = events[:room]
+        if len(events):
+            self.run_events.append(events)
+            self.run_event_count += len(events)
+
+    def flush(self):
+        """
+        Write everything aggregated so far to a new .npz file and start afresh
+
+        A run still in progress is ended as abandoned first.
+        """
+        if self.maze is not None:
+            self.end_run("abandon")
+        if not self.runs:
+            return
+        arrays = {
+            "runs": np.array(self.runs, dtype=np.int32).reshape(-1, RUN_FIELDS),
+            "events": np.concatenate(self.run_events) if self.run_events
+            else np.zeros((0, EVENT_FIELDS), dtype=np.int32),
+            "events_dropped": np.array(self.events_dropped, dtype=np.int64),
+        }
+        for level_index, heatmaps in self.heatmaps.items():
+            for name, heatmap in heatmaps.items():
+                arrays[f"level{level_index}_{name}"] = heatmap
+
+        # Compressed on the writer thread; the arrays are never touched again here
+        self.flush_count += 1
+        name = f"session-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.flush_count}.npz"
+        self.writer.write(os.path.join(self.directory, name), partial(_compress, arrays))
+
+        # Run ids restart with every file
+        self.heatmaps = {}
+        self.runs = []
+        self.run_events = []
+        self.run_event_count = 0
+        self.events_dropped = 0
+        self.run_id = 0
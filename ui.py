@@ -5,6 +5,17 @@ UI Module - Enhanced visual design
 import pygame
 from constants import *
 
+# Button fonts by point size, so the hover animation doesn't load a font every frame
+_button_fonts = {}
+
+
+def _button_font(size):
+    font = _button_fonts.get(size)
+    if font is None:
+        font = _button_fonts[size] = pygame.font.Font(FONT_NAME, size)
+    return font
+
+
 class Button:
     """Modern animated button"""
 
@@ -14,10 +25,17 @@ class Button:
         self.color = color
         self.hover_color = hover_color
         self.is_hovered = False
-        self.clicked = False
         self.scale = 1.0
 
-    def update(self, mouse_pos, mouse_pressed):
+    def update(self, mouse_pos, click_pos=None):
+        """
+        Args:
+            mouse_pos: Cursor position
+            click_pos: Position of a left click since the last update, or None
+
+        Returns:
+            bool: True if the button was clicked
+        """
         self.is_hovered = self.rect.collidepoint(mouse_pos)
 
         # Smooth scale animation
@@ -26,19 +44,20 @@ class Button:
         else:
             self.scale = max(1.0, self.scale - 0.02)
 
-        if self.is_hovered and mouse_pressed and not self.clicked:
-            self.clicked = True
-            return True
+        return click_pos is not None and self.rect.collidepoint(click_pos)
 
-        if not mouse_pressed:
-            self.clicked = False
+    @property
+    def animating(self):
+        """True while the hover scale is still moving"""
+        return self.scale != (1.05 if self.is_hovered else 1.0)
 
-        return False
+    def draw(self, screen, quality=QUALITY_FULL):
+        # Hover grows the button at full quality only
+        scale = self.scale if quality == QUALITY_FULL else 1.0
 
-    def draw(self, screen):
         # Create scaled rect
-        scaled_w = int(self.rect.w * self.scale)
-        scaled_h = int(self.rect.h * self.scale)
+        scaled_w = int(self.rect.w * scale)
+        scaled_h = int(self.rect.h * scale)
         scaled_rect = pygame.Rect(
             self.rect.centerx - scaled_w // 2,
             self.rect.centery - scaled_h // 2,
@@ -46,16 +65,17 @@ class Button:
         )
 
         # Shadow
-        shadow = scaled_rect.copy()
-        shadow.y += 4
-        pygame.draw.rect(screen, (0, 0, 0, 100), shadow, border_radius=12)
+        if quality != QUALITY_FLAT:
+            shadow = scaled_rect.copy()
+            shadow.y += 4
+            pygame.draw.rect(screen, (0, 0, 0, 100), shadow, border_radius=12)
 
         # Button
         color = self.hover_color if self.is_hovered else self.color
         pygame.draw.rect(screen, color, scaled_rect, border_radius=12)
         pygame.draw.rect(screen, WHITE, scaled_rect, 3, border_radius=12)
 
-        font = pygame.font.Font(FONT_NAME, int(FONT_SIZE_MEDIUM * self.scale))
+        font = _button_font(int(FONT_SIZE_MEDIUM * scale))
         text_surface = font.render(self.text, True, WHITE)
         text_rect = text_surface.get_rect(center=scaled_rect.center)
         screen.blit(text_surface, text_rect)
@@ -68,6 +88,11 @@ class UI:
         self.font_large = pygame.font.Font(FONT_NAME, FONT_SIZE_LARGE)
         self.font_medium = pygame.font.Font(FONT_NAME, FONT_SIZE_MEDIUM)
         self.font_small = pygame.font.Font(FONT_NAME, FONT_SIZE_SMALL)
+        # Render quality tier, set by GameManager from its QualityController
+        self.quality = QUALITY_FULL
+        # Short status message drawn over every screen (see show_notice)
+        self.notice = None
+        self.notice_until = 0
         self._create_buttons()
 
     def _create_buttons(self):
@@ -115,61 +140,99 @@ class UI:
             SCREEN_WIDTH // 2 - 120, lose_y + 90, 240, 50, "MAIN MENU", BLUE, LIGHT_BLUE
         )
 
-    def update_menu(self, mouse_pos, mouse_pressed):
-        if self.menu_start_btn.update(mouse_pos, mouse_pressed):
+        self.buttons = [
+            self.menu_start_btn, self.menu_instructions_btn, self.menu_exit_btn,
+            self.instructions_back_btn,
+            self.pause_resume_btn, self.pause_restart_btn, self.pause_menu_btn,
+            self.win_next_btn, self.win_menu_btn,
+            self.lose_retry_btn, self.lose_menu_btn,
+        ]
+
+    def animating(self):
+        """True while any button is still in its hover animation or a notice is up"""
+        return self.notice is not None or any(button.animating for button in self.buttons)
+
+    def show_notice(self, text, seconds=NOTICE_SECONDS):
+        """Show a one-line message at the bottom of the screen for a few seconds"""
+        self.notice = self.font_small.render(text, True, WHITE)
+        self.notice_until = pygame.time.get_ticks() + int(seconds * 1000)
+
+    def draw_notice(self):
+        if self.notice is None:
+            return
+        if pygame.time.get_ticks() >= self.notice_until:
+            self.notice = None
+            return
+        rect = self.notice.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 30))
+        panel = rect.inflate(24, 12)
+        pygame.draw.rect(self.screen, (10, 20, 40), panel, border_radius=6)
+        pygame.draw.rect(self.screen, CYAN, panel, 2, border_radius=6)
+        self.screen.blit(self.notice, rect)
+
+    def update_menu(self, mouse_pos, click_pos=None):
+        if self.menu_start_btn.update(mouse_pos, click_pos):
             return "start"
-        if self.menu_instructions_btn.update(mouse_pos, mouse_pressed):
+        if self.menu_instructions_btn.update(mouse_pos, click_pos):
             return "instructions"
-        if self.menu_exit_btn.update(mouse_pos, mouse_pressed):
+        if self.menu_exit_btn.update(mouse_pos, click_pos):
             return "exit"
         return None
 
-    def update_instructions(self, mouse_pos, mouse_pressed):
-        if self.instructions_back_btn.update(mouse_pos, mouse_pressed):
+    def update_instructions(self, mouse_pos, click_pos=None):
+        if self.instructions_back_btn.update(mouse_pos, click_pos):
             return "back"
         return None
 
-    def update_pause(self, mouse_pos, mouse_pressed):
-        if self.pause_resume_btn.update(mouse_pos, mouse_pressed):
+    def update_pause(self, mouse_pos, click_pos=None):
+        if self.pause_resume_btn.update(mouse_pos, click_pos):
             return "resume"
-        if self.pause_restart_btn.update(mouse_pos, mouse_pressed):
+        if self.pause_restart_btn.update(mouse_pos, click_pos):
             return "restart"
-        if self.pause_menu_btn.update(mouse_pos, mouse_pressed):
+        if self.pause_menu_btn.update(mouse_pos, click_pos):
             return "menu"
         return None
 
-    def update_win(self, mouse_pos, mouse_pressed):
-        if self.win_next_btn.update(mouse_pos, mouse_pressed):
+    def update_win(self, mouse_pos, click_pos=None):
+        if self.win_next_btn.update(mouse_pos, click_pos):
             return "next"
-        if self.win_menu_btn.update(mouse_pos, mouse_pressed):
+        if self.win_menu_btn.update(mouse_pos, click_pos):
             return "menu"
         return None
 
-    def update_lose(self, mouse_pos, mouse_pressed):
-        if self.lose_retry_btn.update(mouse_pos, mouse_pressed):
+    def update_lose(self, mouse_pos, click_pos=None):
+        if self.lose_retry_btn.update(mouse_pos, click_pos):
             return "retry"
-        if self.lose_menu_btn.update(mouse_pos, mouse_pressed):
+        if self.lose_menu_btn.update(mouse_pos, click_pos):
             return "menu"
         return None
 
-    def draw_menu(self):
-        # Gradient background
+    def _draw_gradient(self, top, change, shade=1.0):
+        """Vertical gradient from top to top + change; one flat colour at QUALITY_FLAT"""
+        if self.quality == QUALITY_FLAT:
+            self.screen.fill(tuple(int((t + c / 2) * shade) for t, c in zip(top, change)))
+            return
         for y in range(0, SCREEN_HEIGHT, 2):
             ratio = y / SCREEN_HEIGHT
-            color = (int(10 + 30 * ratio), int(10 + 40 * ratio), int(30 + 60 * ratio))
+            color = tuple(int((t + c * ratio) * shade) for t, c in zip(top, change))
             pygame.draw.line(self.screen, color, (0, y), (SCREEN_WIDTH, y))
 
-        for i in range(3):
-            blur_surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            blur_surf.fill((0, 0, 0, 40))
-            self.screen.blit(blur_surf, (0, 0))
+    def draw_menu(self):
+        # Gradient background; below full quality it is shaded as dark as the blur would make it
+        shade = 1.0 if self.quality == QUALITY_FULL else (1 - 40 / 255) ** 3
+        self._draw_gradient((10, 10, 30), (30, 40, 60), shade)
 
-        # Title with glow
         title_text = "ESCAPE THE MAZE!"
-        for offset in range(5, 0, -1):
-            glow_surf = self.font_large.render(title_text, True, (0, 255, 255, 50))
-            glow_rect = glow_surf.get_rect(center=(SCREEN_WIDTH // 2, 120 + offset))
-            self.screen.blit(glow_surf, glow_rect)
+        if self.quality == QUALITY_FULL:
+            for i in range(3):
+                blur_surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+                blur_surf.fill((0, 0, 0, 40))
+                self.screen.blit(blur_surf, (0, 0))
+
+            # Title with glow
+            for offset in range(5, 0, -1):
+                glow_surf = self.font_large.render(title_text, True, (0, 255, 255, 50))
+                glow_rect = glow_surf.get_rect(center=(SCREEN_WIDTH // 2, 120 + offset))
+                self.screen.blit(glow_surf, glow_rect)
 
         title = self.font_large.render(title_text, True, CYAN)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 120))
@@ -179,9 +242,9 @@ class UI:
         subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 190))
         self.screen.blit(subtitle, subtitle_rect)
 
-        self.menu_start_btn.draw(self.screen)
-        self.menu_instructions_btn.draw(self.screen)
-        self.menu_exit_btn.draw(self.screen)
+        self.menu_start_btn.draw(self.screen, self.quality)
+        self.menu_instructions_btn.draw(self.screen, self.quality)
+        self.menu_exit_btn.draw(self.screen, self.quality)
 
     def draw_instructions(self):
         self.screen.fill((15, 20, 40))
@@ -219,7 +282,7 @@ class UI:
             self.screen.blit(text, text_rect)
             y += 45
 
-        self.instructions_back_btn.draw(self.screen)
+        self.instructions_back_btn.draw(self.screen, self.quality)
 
     def draw_hud(self, time_left, collected, total, level_name, score):
         # Modern HUD panel
@@ -250,24 +313,22 @@ class UI:
         self.screen.blit(overlay, (0, 0))
 
         # Blur effect - draw game dimmed multiple times
-        for i in range(3):
-            blur_surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            blur_surf.fill((0, 0, 0, 40))
-            self.screen.blit(blur_surf, (0, 0))
+        if self.quality == QUALITY_FULL:
+            for i in range(3):
+                blur_surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+                blur_surf.fill((0, 0, 0, 40))
+                self.screen.blit(blur_surf, (0, 0))
 
         pause_text = self.font_large.render("PAUSED", True, CYAN)
         pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH // 2, 180))
         self.screen.blit(pause_text, pause_rect)
 
-        self.pause_resume_btn.draw(self.screen)
-        self.pause_restart_btn.draw(self.screen)
-        self.pause_menu_btn.draw(self.screen)
+        self.pause_resume_btn.draw(self.screen, self.quality)
+        self.pause_restart_btn.draw(self.screen, self.quality)
+        self.pause_menu_btn.draw(self.screen, self.quality)
 
-    def draw_win_screen(self, level_name, time_taken, score):
-        for y in range(0, SCREEN_HEIGHT, 2):
-            ratio = y / SCREEN_HEIGHT
-            color = (int(10 + 20 * ratio), int(40 + 40 * ratio), int(10 + 30 * ratio))
-            pygame.draw.line(self.screen, color, (0, y), (SCREEN_WIDTH, y))
+    def draw_win_screen(self, level_name, time_taken, score, best=None):
+        self._draw_gradient((10, 40, 10), (20, 40, 30))
 
         victory_text = self.font_large.render("LEVEL COMPLETE!", True, GREEN)
         victory_rect = victory_text.get_rect(center=(SCREEN_WIDTH // 2, 120))
@@ -286,14 +347,20 @@ class UI:
             self.screen.blit(text, text_rect)
             y += 60
 
-        self.win_next_btn.draw(self.screen)
-        self.win_menu_btn.draw(self.screen)
+        # Leaderboard bests: (best_time, best_score, wins, runs)
+        if best and best[0] is not None:
+            best_text = self.font_small.render(
+                f"Best: {best[0]:.1f}s  |  High score: {best[1]}  |  Wins: {best[2]}/{best[3]}",
+                True, YELLOW
+            )
+            best_rect = best_text.get_rect(center=(SCREEN_WIDTH // 2, y - 25))
+            self.screen.blit(best_text, best_rect)
 
-    def draw_lose_screen(self, reason):
-        for y in range(0, SCREEN_HEIGHT, 2):
-            ratio = y / SCREEN_HEIGHT
-            color = (int(40 + 20 * ratio), int(10 + 10 * ratio), int(10 + 10 * ratio))
-            pygame.draw.line(self.screen, color, (0, y), (SCREEN_WIDTH, y))
+        self.win_next_btn.draw(self.screen, self.quality)
+        self.win_menu_btn.draw(self.screen, self.quality)
+
+    def draw_lose_screen(self, reason, hint=None):
+        self._draw_gradient((40, 10, 10), (20, 10, 10))
 
         gameover_text = self.font_large.render("GAME OVER!", True, RED)
         gameover_rect = gameover_text.get_rect(center=(SCREEN_WIDTH // 2, 140))
@@ -303,5 +370,10 @@ class UI:
         reason_rect = reason_text.get_rect(center=(SCREEN_WIDTH // 2, 240))
         self.screen.blit(reason_text, reason_rect)
 
-        self.lose_retry_btn.draw(self.screen)
-        self.lose_menu_btn.draw(self.screen)
\ No newline at end of file
+        if hint:
+            hint_text = self.font_small.render(hint, True, GRAY)
+            hint_rect = hint_text.get_rect(center=(SCREEN_WIDTH // 2, 300))
+            self.screen.blit(hint_text, hint_rect)
+
+        self.lose_retry_btn.draw(self.screen, self.quality)
+        self.lose_menu_btn.draw(self.screen, self.quality)
\ No newline at end of file
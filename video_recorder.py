@@ -0,0 +1,265 @@
+"""
+Video Recorder - Captures displayed frames and writes them on a background thread
+"""
+
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+import pygame
+from constants import RECORDING_DIR, RECORDING_POOL_SIZE, RECORDING_FORMAT, FPS
+
+# "auto" picks "video" when ffmpeg is on the PATH, else "png"
+FORMATS = ("auto", "video", "png", "raw")
+
+# ffmpeg pixel formats for 32-bit frames, by the byte offsets of R, G, B
+FFMPEG_PIXEL_FORMATS = {(0, 1, 2): "rgb0", (2, 1, 0): "bgr0", (1, 2, 3): "0rgb", (3, 2, 1): "0bgr"}
+
+
+def _channel_offsets(surface):
+    """Byte offsets of R, G and B within one pixel of a 32-bit surface"""
+    offsets = [shift // 8 for shift in surface.get_shifts()[:3]]
+    if sys.byteorder == "big":
+        offsets = [3 - offset for offset in offsets]
+    return tuple(offsets)
+
+
+class _PngSink:
+    def __init__(self, directory, size, fps, channels, offsets):
+        self.directory = directory
+        self.size = size
+        self.offsets = list(offsets)
+
+    def write(self, frame, number, repeat):
+        rgb = np.ascontiguousarray(frame[..., self.offsets])
+        image = pygame.image.frombuffer(rgb, self.size, "RGB")
+        pygame.image.save(image, os.path.join(self.directory, f"frame{number:06d}.png"))
+
+    def close(self):
+        pass
+
+
+class _RawSink:
+    """Frames back to back in frames.raw, described by frames.txt"""
+
+    def __init__(self, directory, size, fps, channels, offsets):
+        with open(os.path.join(directory, "frames.txt"), "w") as info:
+            info.write(f"width={size[0]}\nheight={size[1]}\nfps={fps}\n"
+                       f"bytes_per_pixel={channels}\nrgb_offsets={','.join(map(str, offsets))}\n")
+        self.file = open(os.path.join(directory, "frames.raw"), "wb")
+
+    def write(self, frame, number, repeat):
+        for _ in range(repeat):
+            self.file.write(frame.data)
+
+    def close(self):
+        self.file.close()
+
+
+class _VideoSink:
+    """Pipes frames into an ffmpeg process that encodes an H.264 .mp4"""
+
+    def __init__(self, directory, size, fps, channels, offsets):
+        pixel_format = FFMPEG_PIXEL_FORMATS.get(offsets) if channels == 4 else None
+        self.convert = None
+        if pixel_format is None:
+            pixel_format = "rgb24"
+            self.convert = list(offsets)
+        command = [
+            shutil.which("ffmpeg") or "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", pixel_format,
+            "-s", f"{size[0]}x{size[1]}", "-r", str(fps), "-i", "-",
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            os.path.join(directory, "recording.mp4"),
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame, number, repeat):
+        if self.convert:
+            frame = np.ascontiguousarray(frame[..., self.convert])
+        # Repeating the frame for dropped ones keeps the video in real time
+        for _ in range(repeat):
+            self.process.stdin.write(frame.data)
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+SINKS = {"video": _VideoSink, "png": _PngSink, "raw": _RawSink}
+
+
+class VideoRecorder:
+    """Grabs each displayed frame into a pooled buffer for a writer thread
+
+    capture() costs one copy of the screen pixels into a free buffer from
+    a fixed pool; the writer thread converts and writes frames from there
+    and hands the buffers back. When the writer falls behind and no buffer
+    is free, the frame is dropped rather than making the game wait.
+
+    One writer thread serves every recording of the session: start() and
+    stop() only queue markers, so toggling recording never blocks either.
+    """
+
+    def __init__(self, directory=RECORDING_DIR, pool_size=RECORDING_POOL_SIZE,
+                 output=RECORDING_FORMAT, fps=FPS):
+        """
+        Args:
+            directory: Folder that gets one subfolder per recording
+            pool_size: Frames that can wait for the writer before dropping
+            output: One of FORMATS
+            fps: Frame rate written into videos
+        """
+        if output not in FORMATS:
+            raise ValueError(f"Unknown recording format: {output}")
+        if output == "auto":
+            output = "video" if shutil.which("ffmpeg") else "png"
+        self.directory = directory
+        self.pool_size = pool_size
+        self.output = output
+        self.fps = fps
+
+        self.recording = False
+        self.frame_number = 0
+        self.frames = 0
+        self.dropped = 0
+        self.last_error = None
+        self.recording_count = 0
+
+        self.pool = []
+        self.pool_shape = None
+        self.free = queue.SimpleQueue()
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="video-writer", daemon=True)
+        self.thread.start()
+
+    # ----------------------
+    # Game loop side
+    # ----------------------
+    def start(self, surface):
+        """
+        Begin a new recording of frames shaped like surface
+
+        Returns:
+            str: Folder the recording is written to
+        """
+        if self.recording:
+            self.stop()
+        width, height = surface.get_size()
+        if surface.get_bytesize() == 4:
+            shape = (height, width, 4)
+            offsets = _channel_offsets(surface)
+        else:
+            shape = (height, width, 3)
+            offsets = (0, 1, 2)
+        self._fill_pool(shape)
+
+        self.recording_count += 1
+        name = f"recording-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.recording_count}"
+        path = os.path.join(self.directory, name)
+        self.queue.put(("start", path, (width, height), shape[2], offsets))
+        self.recording = True
+        self.frame_number = 0
+        self.frames = 0
+        self.dropped = 0
+        return path
+
+    def stop(self):
+        """End the current recording; queued frames are still written"""
+        if self.recording:
+            self.recording = False
+            self.queue.put(("stop",))
+
+    def toggle(self, surface):
+        """
+        Returns:
+            bool: True if recording now
+        """
+        if self.recording:
+            self.stop()
+        else:
+            self.start(surface)
+        return self.recording
+
+    def capture(self, surface):
+        """Queue the surface's current pixels, or drop the frame if the pool is empty"""
+        if not self.recording:
+            return
+        number = self.frame_number
+        self.frame_number += 1
+        try:
+            frame = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return
+
+        if frame.shape[2] == 4:
+            # The transposed pixel view is row-major, so this is a straight memory copy
+            pixels = pygame.surfarray.pixels2d(surface)
+            np.copyto(frame.view(np.uint32)[..., 0], pixels.T)
+        else:
+            pixels = pygame.surfarray.pixels3d(surface)
+            np.copyto(frame, pixels.transpose(1, 0, 2))
+        del pixels  # unlock the surface before it is flipped
+        self.frames += 1
+        self.queue.put(("frame", frame, number))
+
+    def close(self):
+        """Finish writing everything queued, then stop the writer thread"""
+        self.stop()
+        self.queue.put(None)
+        self.thread.join()
+
+    def _fill_pool(self, shape):
+        if shape == self.pool_shape:
+            return
+        # Buffers of the old shape are dropped as the writer returns them
+        self.pool_shape = shape
+        self.free = queue.SimpleQueue()
+        self.pool = [np.zeros(shape, dtype=np.uint8) for _ in range(self.pool_size)]
+        for frame in self.pool:
+            self.free.put(frame)
+
+    # ----------------------
+    # Writer thread
+    # ----------------------
+    def _run(self):
+        sink = None
+        last_number = -1
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            kind = item[0]
+            try:
+                if kind == "start":
+                    if sink is not None:
+                        sink.close()
+                    _, path, size, channels, offsets = item
+                    os.makedirs(path, exist_ok=True)
+                    sink = SINKS[self.output](path, size, self.fps, channels, offsets)
+                    last_number = -1
+                elif kind == "stop":
+                    if sink is not None:
+                        sink.close()
+                    sink = None
+                elif kind == "frame":
+                    _, frame, number = item
+                    try:
+                        if sink is not None:
+                            sink.write(frame, number, number - last_number)
+                            last_number = number
+                    finally:
+                        if frame.shape == self.pool_shape:
+                            self.free.put(frame)
+            except (OSError, ValueError, pygame.error) as e:
+                # Keep the game going; this recording stops here
+                self.last_error = e
+                sink = None
+
+        if sink is not None:
+            sink.close()
@@ -0,0 +1,62 @@
+"""
+Visit Grid - Compact per-level tile visit counts for enemy patrol memory
+"""
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up decay
+    np = None
+
+MAX_VISITS = 0xFFFF
+
+
+class VisitGrid:
+    """Saturating 16-bit visit counter per tile, stored row-major in one array"""
+
+    __slots__ = ("width", "height", "counts")
+
+    def __init__(self, width, height):
+        """
+        Args:
+            width: Grid width in tiles
+            height: Grid height in tiles
+        """
+        self.width = width
+        self.height = height
+        self.counts = array("H", bytes(2 * width * height))
+
+    def get(self, x, y):
+        """Visits of a tile; 0 for tiles outside the grid"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.counts[y * self.width + x]
+        return 0
+
+    def add(self, x, y, amount=1):
+        """Add (or with a negative amount, remove) visits, clamped to the counter range"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = y * self.width + x
+            self.counts[index] = max(0, min(MAX_VISITS, self.counts[index] + amount))
+
+    def clear(self):
+        self.counts = array("H", bytes(2 * self.width * self.height))
+
+    def decay(self):
+        """Halve every count so old patrol history fades out"""
+        if np is not None:
+            view = np.frombuffer(self.counts, dtype=np.uint16)
+            view >>= 1
+        else:
+            self.counts = array("H", (count >> 1 for count in self.counts))
+
+    def to_bytes(self):
+        return self.counts.tobytes()
+
+    def load_bytes(self, data):
+        """Replace the counts with bytes produced by to_bytes()"""
+        counts = array("H")
+        counts.frombytes(data)
+        if len(counts) != self.width * self.height:
+            raise ValueError("Visit data doesn't match the grid size")
+        self.counts = counts
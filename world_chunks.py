@@ -0,0 +1,553 @@
+"""
+World Chunks - Streams levels too large to build at once from chunk files
+"""
+
+import os
+import queue
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+import pygame
+from constants import (
+    TILE_SIZE, WHITE, DARK_BLUE, WORLD_CHUNK_SIZE, WORLD_ACTIVE_RADIUS,
+    WORLD_PREFETCH_RADIUS, WORLD_CHUNK_CACHE, QUALITY_FLAT, QUALITY_FULL,
+    ENEMY_LOSE_DISTANCE
+)
+from image_cache import render_sprite
+from visit_grid import VisitGrid
+from fov import FieldOfView
+from player import Player
+from enemy import Enemy, CHASE_DISTANCE_SQ
+from collectible import Collectible
+from maze import draw_wall, draw_exit
+
+WORLD_MAGIC = b"ETMW"
+WORLD_VERSION = 1
+WORLD_FILE = "world.dat"
+
+# magic, version, chunk size, width, height, player x, player y,
+# exit x, exit y, collectible count
+WORLD_HEADER = struct.Struct("<4sHHIIiiiiI")
+
+# Maps chunk cell codes to wall flags (1 for walls, 0 for everything else)
+WALL_FLAGS = bytes(int(code == 1) for code in range(256))
+
+# The player's view of a streamed world reaches just past where chasing enemies give up
+WORLD_VIEW_RADIUS = ENEMY_LOSE_DISTANCE // TILE_SIZE + 1
+
+
+class WorldError(Exception):
+    """Raised when a chunked world is missing, corrupt or from another version"""
+
+
+def _chunk_path(directory, cx, cy):
+    return os.path.join(directory, f"chunk_{cx}_{cy}.bin")
+
+
+def write_world(rows, directory, chunk_size=WORLD_CHUNK_SIZE):
+    """
+    Split a layout into chunk files on disk
+
+    Only one band of chunk_size rows is held in memory at a time, so rows
+    can come from a generator for worlds that never fit in memory whole.
+
+    Args:
+        rows: Iterable of equally long layout rows, using the same cell
+            codes as the LEVEL_n_MAZE lists
+        directory: Folder to write the world into
+        chunk_size: Chunk edge length in tiles
+
+    Returns:
+        tuple: (width, height) in tiles
+    """
+    os.makedirs(directory, exist_ok=True)
+    width = None
+    height = 0
+    player = exit_tile = (-1, -1)
+    collectibles = 0
+    band = []
+
+    def flush_band(chunk_y):
+        for chunk_x in range((width + chunk_size - 1) // chunk_size):
+            # Padding past the world edge is solid wall
+            tiles = bytearray(b"\x01" * (chunk_size * chunk_size))
+            for local_y, band_row in enumerate(band):
+                segment = band_row[chunk_x * chunk_size:(chunk_x + 1) * chunk_size]
+                start = local_y * chunk_size
+                tiles[start:start + len(segment)] = segment
+            with open(_chunk_path(directory, chunk_x, chunk_y), "wb") as f:
+                f.write(zlib.compress(bytes(tiles)))
+
+    for row in rows:
+        row = bytes(row)
+        if width is None:
+            width = len(row)
+        elif len(row) != width:
+            raise WorldError("Every row of a world must have the same width")
+
+        if b"\x02" in row:
+            player = (row.index(2), height)
+        if b"\x03" in row:
+            exit_tile = (row.index(3), height)
+        collectibles += row.count(5)
+
+        band.append(row)
+        height += 1
+        if len(band) == chunk_size:
+            flush_band(height // chunk_size - 1)
+            band = []
+
+    if width is None:
+        raise WorldError("A world needs at least one row")
+    if band:
+        flush_band(height // chunk_size)
+
+    header = WORLD_HEADER.pack(
+        WORLD_MAGIC, WORLD_VERSION, chunk_size, width, height,
+        player[0], player[1], exit_tile[0], exit_tile[1], collectibles
+    )
+    with open(os.path.join(directory, WORLD_FILE), "wb") as f:
+        f.write(header)
+    return width, height
+
+
+class ChunkCache:
+    """LRU cache of decoded chunk tiles, filled ahead of time by a prefetch thread"""
+
+    def __init__(self, directory, chunk_size, capacity=WORLD_CHUNK_CACHE):
+        """
+        Args:
+            directory: World folder written by write_world()
+            chunk_size: Chunk edge length in tiles
+            capacity: Most chunks kept decoded in memory
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.capacity = capacity
+        self.chunks = OrderedDict()
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        # Chunks the main thread had to load itself because prefetch was late
+        self.misses = 0
+
+        self.thread = threading.Thread(target=self._run, name="chunk-prefetch", daemon=True)
+        self.thread.start()
+
+    def _load(self, key):
+        cx, cy = key
+        try:
+            with open(_chunk_path(self.directory, cx, cy), "rb") as f:
+                tiles = zlib.decompress(f.read())
+        except (OSError, zlib.error) as e:
+            raise WorldError(f"Can't read chunk {cx},{cy}: {e}") from e
+        if len(tiles) != self.chunk_size * self.chunk_size:
+            raise WorldError(f"Chunk {cx},{cy} has the wrong size")
+        return tiles
+
+    def _store(self, key, tiles):
+        with self.lock:
+            self.chunks[key] = tiles
+            self.chunks.move_to_end(key)
+            self.pending.discard(key)
+            while len(self.chunks) > self.capacity:
+                self.chunks.popitem(last=False)
+
+    def _run(self):
+        while True:
+            key = self.queue.get()
+            if key is None:
+                return
+            try:
+                self._store(key, self._load(key))
+            except WorldError:
+                # get() will hit the same error on the main thread and report it
+                with self.lock:
+                    self.pending.discard(key)
+
+    def prefetch(self, keys):
+        """Queue chunks to be decoded in the background, nearest first"""
+        with self.lock:
+            for key in keys:
+                if key not in self.chunks and key not in self.pending:
+                    self.pending.add(key)
+                    self.queue.put(key)
+
+    def get(self, key):
+        """
+        Tiles of a chunk, loading it right away if prefetch hasn't yet
+
+        Raises:
+            WorldError: If the chunk file can't be read
+        """
+        with self.lock:
+            tiles = self.chunks.get(key)
+            if tiles is not None:
+                self.chunks.move_to_end(key)
+                return tiles
+        self.misses += 1
+        tiles = self._load(key)
+        self._store(key, tiles)
+        return tiles
+
+    def close(self):
+        self.queue.put(None)
+
+
+def _paint_wall(surface):
+    draw_wall(surface, pygame.Rect(0, 0, TILE_SIZE, TILE_SIZE))
+
+
+def _paint_flat_wall(surface):
+    draw_wall(surface, surface.get_rect(), flat=True)
+
+
+class _ResidentChunk:
+    """Walls and live entities of one chunk near the player"""
+
+    __slots__ = ("walls", "wall_flags", "enemies", "collectibles", "visits")
+
+    def __init__(self, chunk_size, tiles):
+        self.walls = []
+        self.wall_flags = tiles.translate(WALL_FLAGS)
+        self.enemies = []
+        self.collectibles = []
+        self.visits = VisitGrid(chunk_size, chunk_size)
+
+
+class _WorldVisits:
+    """VisitGrid-style access to the visit grids of resident chunks"""
+
+    __slots__ = ("world",)
+
+    def __init__(self, world):
+        self.world = world
+
+    def _locate(self, x, y):
+        size = self.world.chunk_size
+        return self.world.resident.get((x // size, y // size)), x % size, y % size
+
+    def get(self, x, y):
+        chunk, local_x, local_y = self._locate(x, y)
+        return chunk.visits.get(local_x, local_y) if chunk else 0
+
+    def add(self, x, y, amount=1):
+        chunk, local_x, local_y = self._locate(x, y)
+        if chunk:
+            chunk.visits.add(local_x, local_y, amount)
+
+
+class _WorldView:
+    """FieldOfView over the resident chunks, addressed in world tiles
+
+    Rebuilt whenever the resident area moves. Tiles outside it count as
+    walls, like the boundary strips that keep entities inside it.
+    """
+
+    __slots__ = ("fov", "origin_x", "origin_y")
+
+    def __init__(self, wall_grid, origin_x, origin_y, width, height):
+        self.fov = FieldOfView(wall_grid, width, height, WORLD_VIEW_RADIUS)
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+
+    def update(self, x, y):
+        self.fov.update(x - self.origin_x, y - self.origin_y)
+
+    def is_visible(self, x, y):
+        return self.fov.is_visible(x - self.origin_x, y - self.origin_y)
+
+
+class ChunkedWorld:
+    """Level streamed from disk around the player
+
+    Only the chunks within WORLD_ACTIVE_RADIUS of the player's chunk are
+    resident, with their walls, enemies and collectibles. The next ring
+    out is decoded by the prefetch thread, so crossing a chunk border only
+    builds entities from tiles that are already in memory. Enemies belong
+    to the chunk they are in, moving to another as they cross into it, so
+    one chasing the player stays resident with the player. An enemy is
+    dropped when its chunk unloads and respawns at its spawn tile, straight
+    away if that chunk is still loaded or else once it is loaded again. Collected items are remembered by tile so they stay
+    collected.
+
+    Offers the parts of the Maze interface that GameManager uses while
+    playing. Rewind and quick-save need a fixed set of entities, so they
+    are not available for streamed levels.
+    """
+
+    streaming = True
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: World folder written by write_world()
+
+        Raises:
+            WorldError: If the world header is missing or invalid
+        """
+        try:
+            with open(os.path.join(directory, WORLD_FILE), "rb") as f:
+                header = f.read(WORLD_HEADER.size)
+        except OSError as e:
+            raise WorldError(f"Can't read world: {e}") from e
+        if len(header) != WORLD_HEADER.size:
+            raise WorldError("World header is truncated")
+
+        (magic, version, self.chunk_size, self.width, self.height,
+         player_x, player_y, exit_x, exit_y, self.total_collectibles) = WORLD_HEADER.unpack(header)
+        if magic != WORLD_MAGIC:
+            raise WorldError("Not a world folder")
+        if version != WORLD_VERSION:
+            raise WorldError(f"Unsupported world version {version}")
+
+        self.chunks_x = (self.width + self.chunk_size - 1) // self.chunk_size
+        self.chunks_y = (self.height + self.chunk_size - 1) // self.chunk_size
+        self.cache = ChunkCache(directory, self.chunk_size)
+        self.resident = {}
+        self.center = None
+        self.walls = []
+        self.enemies = []
+        self.collectibles = []
+        self.collected = set()
+        self.visits = _WorldVisits(self)
+        self.view = None
+        # Chunk each resident enemy belongs to, and the spawn tiles of
+        # resident enemies (so a reloaded chunk doesn't spawn them twice)
+        self.enemy_chunks = {}
+        self.spawned = set()
+
+        self.player_start = (player_x, player_y)
+        self.player = Player(player_x, player_y) if player_x >= 0 else None
+        self.exit_rect = None
+        if exit_x >= 0:
+            self.exit_rect = pygame.Rect(exit_x * TILE_SIZE, exit_y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        self.exit_unlocked = self.total_collectibles == 0
+        self.exit_text = None
+
+        try:
+            self._update_residency()
+        except WorldError:
+            self.close()
+            raise
+
+    # ----------------------
+    # Residency
+    # ----------------------
+    def _chunks_around(self, cx, cy, radius):
+        keys = [
+            (x, y)
+            for y in range(max(0, cy - radius), min(self.chunks_y, cy + radius + 1))
+            for x in range(max(0, cx - radius), min(self.chunks_x, cx + radius + 1))
+        ]
+        keys.sort(key=lambda key: abs(key[0] - cx) + abs(key[1] - cy))
+        return keys
+
+    def _update_residency(self):
+        """Load and unload chunks when the player enters a new chunk"""
+        if self.player:
+            tile_x, tile_y = self.player.grid_x, self.player.grid_y
+        else:
+            tile_x = tile_y = 0
+        center = (tile_x // self.chunk_size, tile_y // self.chunk_size)
+        if center == self.center:
+            return
+        self.center = center
+
+        wanted = self._chunks_around(*center, WORLD_ACTIVE_RADIUS)
+        self.cache.prefetch(self._chunks_around(*center, WORLD_PREFETCH_RADIUS))
+
+        wanted_set = set(wanted)
+        dropped = []
+        for key in list(self.resident):
+            if key not in wanted_set:
+                for enemy in self.resident.pop(key).enemies:
+                    del self.enemy_chunks[enemy]
+                    self.spawned.discard((enemy.start_x, enemy.start_y))
+                    dropped.append(enemy)
+        for key in wanted:
+            if key not in self.resident:
+                self._build_chunk(key, self.cache.get(key))
+
+        # Enemies that wandered out of a spawn chunk that stays loaded start over there
+        size = self.chunk_size
+        for enemy in dropped:
+            spawn = (enemy.start_x, enemy.start_y)
+            if (spawn[0] // size, spawn[1] // size) in self.resident and spawn not in self.spawned:
+                self.spawned.add(spawn)
+                enemy.reset()
+
+        self.walls = [wall for chunk in self.resident.values() for wall in chunk.walls]
+        self.walls.extend(self._boundary_walls(wanted))
+        self.enemies = [enemy for chunk in self.resident.values() for enemy in chunk.enemies]
+        self.collectibles = [item for chunk in self.resident.values() for item in chunk.collectibles]
+        self.view = self._build_view(wanted)
+
+    def _build_chunk(self, key, tiles):
+        chunk = _ResidentChunk(self.chunk_size, tiles)
+        # Register first: enemies record their spawn tile in the chunk's visits
+        self.resident[key] = chunk
+
+        size = self.chunk_size
+        origin_x = key[0] * size
+        origin_y = key[1] * size
+        for index, cell in enumerate(tiles):
+            if not cell:
+                continue
+            x = origin_x + index % size
+            y = origin_y + index // size
+            if cell == 1:
+                chunk.walls.append(pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+            elif cell == 4 and (x, y) not in self.spawned:
+                enemy = Enemy(x, y, self.visits, on_tile_change=self._enemy_moved)
+                chunk.enemies.append(enemy)
+                self.enemy_chunks[enemy] = key
+                self.spawned.add((x, y))
+            elif cell == 5 and (x, y) not in self.collected:
+                chunk.collectibles.append(Collectible(x, y))
+
+    def _enemy_moved(self, enemy):
+        """Hand an enemy that changed tile over to the chunk it is now in"""
+        size = self.chunk_size
+        key = (enemy.grid_x // size, enemy.grid_y // size)
+        old_key = self.enemy_chunks.get(enemy)
+        if key != old_key and key in self.resident:
+            if old_key is not None:
+                self.resident[old_key].enemies.remove(enemy)
+            self.resident[key].enemies.append(enemy)
+            self.enemy_chunks[enemy] = key
+
+    def _build_view(self, keys):
+        """Player field of view over a wall grid of the resident chunks"""
+        size = self.chunk_size
+        left = min(key[0] for key in keys)
+        top = min(key[1] for key in keys)
+        columns = max(key[0] for key in keys) - left + 1
+        rows = max(key[1] for key in keys) - top + 1
+        width = columns * size
+
+        grid = bytearray(b"\x01" * (width * rows * size))
+        for (cx, cy) in keys:
+            flags = self.resident[(cx, cy)].wall_flags
+            start = (cy - top) * size * width + (cx - left) * size
+            for row in range(size):
+                offset = start + row * width
+                grid[offset:offset + size] = flags[row * size:(row + 1) * size]
+        return _WorldView(grid, left * size, top * size, width, rows * size)
+
+    def _boundary_walls(self, keys):
+        """Solid strips around the resident area so nothing walks into unloaded chunks"""
+        size = self.chunk_size * TILE_SIZE
+        left = min(key[0] for key in keys) * size
+        top = min(key[1] for key in keys) * size
+        right = (max(key[0] for key in keys) + 1) * size
+        bottom = (max(key[1] for key in keys) + 1) * size
+        return [
+            pygame.Rect(left - TILE_SIZE, top - TILE_SIZE, right - left + 2 * TILE_SIZE, TILE_SIZE),
+            pygame.Rect(left - TILE_SIZE, bottom, right - left + 2 * TILE_SIZE, TILE_SIZE),
+            pygame.Rect(left - TILE_SIZE, top, TILE_SIZE, bottom - top),
+            pygame.Rect(right, top, TILE_SIZE, bottom - top),
+        ]
+
+    # ----------------------
+    # Maze interface
+    # ----------------------
+    def update(self, keys=None):
+        if self.player:
+            if keys is None:
+                keys = pygame.key.get_pressed()
+            self.player.handle_input(keys)
+            self.player.update(self.walls)
+            self._update_residency()
+            self.view.update(self.player.grid_x, self.player.grid_y)
+
+            player_pos = self.player.get_position()
+            player_x, player_y = player_pos
+            for enemy in self.enemies:
+                near = (player_x - enemy.x) ** 2 + (player_y - enemy.y) ** 2 < CHASE_DISTANCE_SQ
+                enemy.update(player_pos, self.walls, self.view, perceive=near)
+
+            player_rect = self.player.get_rect()
+            for collectible in self.collectibles:
+                collectible.update()
+                if collectible.check_collision(player_rect):
+                    self.collected.add((collectible.x // TILE_SIZE, collectible.y // TILE_SIZE))
+
+            self.exit_unlocked = len(self.collected) >= self.total_collectibles
+
+    def check_player_enemy_collision(self):
+        if self.player:
+            player_rect = self.player.get_rect()
+            for enemy in self.enemies:
+                if player_rect.colliderect(enemy.get_rect()):
+                    return True
+        return False
+
+    def check_player_exit_collision(self):
+        if self.player and self.exit_rect and self.exit_unlocked:
+            return self.player.get_rect().colliderect(self.exit_rect)
+        return False
+
+    def get_collected_count(self):
+        return len(self.collected)
+
+    def get_total_collectibles(self):
+        return self.total_collectibles
+
+    def reset(self):
+        """Restart the world from the player's start with every item back in place"""
+        self.collected.clear()
+        self.resident.clear()
+        self.enemy_chunks.clear()
+        self.spawned.clear()
+        self.center = None
+        if self.player:
+            self.player.reset(*self.player_start)
+        self.exit_unlocked = self.total_collectibles == 0
+        self._update_residency()
+
+    def close(self):
+        """Stop the prefetch thread"""
+        self.cache.close()
+
+    def draw(self, screen, alpha=1.0, quality=QUALITY_FULL):
+        """Draw the part of the world around the player, camera centred on the player"""
+        screen_width, screen_height = screen.get_size()
+        if self.player:
+            focus_x, focus_y = self.player.get_draw_position(alpha)
+        else:
+            focus_x = focus_y = 0
+        camera_x = int(max(0, min(self.width * TILE_SIZE - screen_width, focus_x - screen_width // 2)))
+        camera_y = int(max(0, min(self.height * TILE_SIZE - screen_height, focus_y - screen_height // 2)))
+        view = pygame.Rect(camera_x, camera_y, screen_width, screen_height)
+
+        screen.fill(DARK_BLUE)
+
+        if quality == QUALITY_FLAT:
+            wall_sprite = render_sprite("flat wall", (TILE_SIZE, TILE_SIZE), _paint_flat_wall)
+        else:
+            wall_sprite = render_sprite("wall", (TILE_SIZE + 3, TILE_SIZE + 3), _paint_wall)
+        for chunk in self.resident.values():
+            screen.blits(
+                [(wall_sprite, (chunk.walls[i].x - camera_x, chunk.walls[i].y - camera_y))
+                 for i in view.collidelistall(chunk.walls)],
+                doreturn=False
+            )
+
+        if self.exit_rect and view.colliderect(self.exit_rect):
+            exit_rect = self.exit_rect.move(-camera_x, -camera_y)
+            draw_exit(screen, exit_rect, self.exit_unlocked)
+            if self.exit_text is None:
+                self.exit_text = pygame.font.Font(None, 20).render("EXIT", True, WHITE)
+            screen.blit(self.exit_text, self.exit_text.get_rect(center=exit_rect.center))
+
+        sprites = [collectible.get_sprite() for collectible in self.collectibles]
+        sprites.extend(enemy.get_sprite(alpha) for enemy in self.enemies)
+        if self.player:
+            sprites.append(self.player.get_sprite(alpha))
+        screen.blits(
+            [(image, (x - camera_x, y - camera_y)) for image, (x, y) in filter(None, sprites)],
+            doreturn=False
+        )